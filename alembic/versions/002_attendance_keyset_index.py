@@ -0,0 +1,26 @@
+"""Composite index for attendance keyset pagination
+
+Revision ID: 002_attendance_keyset_index
+Revises: 001_initial
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '002_attendance_keyset_index'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (date, id) serves ORDER BY date DESC, id DESC and the cursor seek; it
+    # supersedes the single-column date index.
+    op.create_index('ix_attendance_date_id', 'attendance', ['date', 'id'])
+    op.drop_index(op.f('ix_attendance_date'), table_name='attendance')
+
+
+def downgrade():
+    op.create_index(op.f('ix_attendance_date'), 'attendance', ['date'])
+    op.drop_index('ix_attendance_date_id', table_name='attendance')
@@ -0,0 +1,40 @@
+"""Monthly attendance rollup table
+
+Revision ID: 003_attendance_monthly
+Revises: 002_attendance_keyset_index
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_attendance_monthly'
+down_revision = '002_attendance_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'attendance_monthly',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('year_month', sa.String(7), nullable=False),
+        sa.Column('class_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('student_id', 'year_month'),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    )
+
+    # Backfill from existing history
+    op.execute(
+        """
+        INSERT INTO attendance_monthly (student_id, year_month, class_count)
+        SELECT student_id, strftime('%Y-%m', date), COUNT(*)
+        FROM attendance
+        GROUP BY student_id, strftime('%Y-%m', date)
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('attendance_monthly')
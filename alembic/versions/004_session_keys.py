@@ -0,0 +1,73 @@
+"""Key sessions by a 16-byte jti instead of the full JWT
+
+Revision ID: 004_session_keys
+Revises: 003_attendance_monthly
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+import base64
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004_session_keys'
+down_revision = '003_attendance_monthly'
+branch_labels = None
+depends_on = None
+
+
+def _session_key(token):
+    # Mirrors app.core.security.session_key: the jti claim when the token has
+    # one, otherwise a truncated SHA-256 of the token.
+    try:
+        payload_part = token.split('.')[1]
+        payload = json.loads(base64.urlsafe_b64decode(payload_part + '=' * (-len(payload_part) % 4)))
+        jti = payload.get('jti')
+        raw = base64.urlsafe_b64decode(jti + '=' * (-len(jti) % 4)) if jti else b''
+    except (IndexError, ValueError, AttributeError, TypeError):
+        raw = b''
+    if len(raw) == 16:
+        return raw
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+
+def upgrade():
+    op.add_column('sessions', sa.Column('session_key', sa.LargeBinary(16), nullable=True))
+
+    conn = op.get_bind()
+    sessions = sa.table(
+        'sessions',
+        sa.column('id', sa.Integer),
+        sa.column('session_token', sa.String),
+        sa.column('session_key', sa.LargeBinary),
+    )
+    rows = conn.execute(sa.select(sessions.c.id, sessions.c.session_token)).all()
+    if rows:
+        conn.execute(
+            sessions.update()
+            .where(sessions.c.id == sa.bindparam('_id'))
+            .values(session_key=sa.bindparam('_key')),
+            [{'_id': row.id, '_key': _session_key(row.session_token)} for row in rows],
+        )
+
+    # Recreating the table drops the full-token column and its unique index
+    with op.batch_alter_table('sessions', recreate='always') as batch_op:
+        batch_op.alter_column('session_key', existing_type=sa.LargeBinary(16), nullable=False)
+        batch_op.drop_column('session_token')
+        batch_op.create_index('ix_sessions_session_key', ['session_key'], unique=True)
+
+
+def downgrade():
+    # The original tokens are gone; restored rows get a placeholder that no
+    # token will match, so those sessions have to log in again.
+    with op.batch_alter_table('sessions', recreate='always') as batch_op:
+        batch_op.drop_index('ix_sessions_session_key')
+        batch_op.add_column(sa.Column('session_token', sa.String(), nullable=True))
+    op.execute("UPDATE sessions SET session_token = 'revoked:' || hex(session_key)")
+    with op.batch_alter_table('sessions', recreate='always') as batch_op:
+        batch_op.alter_column('session_token', existing_type=sa.String(), nullable=False)
+        batch_op.create_unique_constraint('uq_sessions_session_token', ['session_token'])
+        batch_op.drop_column('session_key')
@@ -0,0 +1,38 @@
+"""Student price history with effective dates
+
+Revision ID: 006_student_prices
+Revises: 005_cache_versions
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_student_prices'
+down_revision = '005_cache_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'student_prices',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('effective_from', sa.Date(), nullable=False),
+        sa.Column('price', sa.Numeric(10, 2), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id']),
+        sa.PrimaryKeyConstraint('student_id', 'effective_from'),
+        sqlite_with_rowid=False,
+    )
+    # Until now every class was charged at the current price, so that price
+    # becomes each student's first entry, in effect since the beginning
+    op.execute(
+        "INSERT INTO student_prices (student_id, effective_from, price) "
+        "SELECT id, '0001-01-01', price_per_class FROM students "
+        "WHERE price_per_class IS NOT NULL"
+    )
+
+
+def downgrade():
+    op.drop_table('student_prices')
@@ -1,19 +1,57 @@
 from typing import Optional
-from datetime import datetime
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.core.config import get_settings
+from app.core.cache import Principal, principal_cache
 from app.core.database import get_db
+from app.core.last_seen import last_seen_buffer
+from app.core.security import decode_access_token, session_key
 from app.models.users import User
 from app.models.sessions import Session
 
-settings = get_settings()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
+# create_app() points tokenUrl (used by the OpenAPI docs) at the API_V1_STR prefix
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
+
+
+async def resolve_principal(token: str, db: AsyncSession) -> Optional[Principal]:
+    """Resolve a token to its user and session, using the principal cache.
+
+    Only cache misses touch the database; the result is cached until the
+    token expires or its session is revoked.
+    """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+    username: Optional[str] = payload.get("sub")
+    if username is None:
+        return None
+
+    stmt = select(User).where(User.username == username)
+    result = await db.execute(stmt)
+    user = result.scalar_one_or_none()
+    if user is None:
+        return None
+
+    # Verify session
+    stmt = select(Session).where(
+        Session.session_key == session_key(token, payload.get("jti")),
+        Session.user_id == user.id,
+    )
+    result = await db.execute(stmt)
+    session = result.scalar_one_or_none()
+    if not session:
+        return None
+
+    principal = Principal(user=user, session_id=session.id)
+    principal_cache.set(token, principal, payload.get("exp"))
+    return principal
 
 
 async def get_current_user(
@@ -35,39 +73,13 @@ async def get_current_user(
     if not token:
         raise credentials_exception
 
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except Exception:
+    principal = await resolve_principal(token, db)
+    if principal is None:
         raise credentials_exception
 
-    stmt = select(User).where(User.username == username)
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
-    if user is None:
-        raise credentials_exception
-
-    # Verify session
-    stmt = select(Session).where(
-        Session.session_token == token,
-        Session.user_id == user.id,
-    )
-    result = await db.execute(stmt)
-    session = result.scalar_one_or_none()
-    if not session:
-        raise credentials_exception
-
-    # Update last seen
-    await db.execute(
-        Session.__table__.update()
-        .where(Session.id == session.id)
-        .values(last_seen=datetime.utcnow())
-    )
-    await db.commit()
-
-    return user
+    # Update last seen (flushed in batches by the write-behind buffer)
+    last_seen_buffer.touch(principal.session_id)
+    return principal.user
 
 
 async def get_optional_current_user(
@@ -78,7 +90,8 @@ async def get_optional_current_user(
 
     This helper reads the Authorization header (Bearer token) but does not
     raise on missing/invalid credentials — it returns None instead which is
-    convenient for template rendering.
+    convenient for template rendering. Anonymous requests and cached
+    principals never touch the database (the session only connects lazily).
     """
     auth: Optional[str] = request.headers.get("authorization")
     if not auth:
@@ -93,28 +106,6 @@ async def get_optional_current_user(
     if not auth or not auth.lower().startswith("bearer "):
         return None
     token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-    except JWTError:
-        return None
-
-    stmt = select(User).where(User.username == username)
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
-    if user is None:
-        return None
-
-    # Verify session exists for this token
-    stmt = select(Session).where(
-        Session.session_token == token,
-        Session.user_id == user.id,
-    )
-    result = await db.execute(stmt)
-    session = result.scalar_one_or_none()
-    if not session:
-        return None
 
-    return user
\ No newline at end of file
+    principal = await resolve_principal(token, db)
+    return principal.user if principal is not None else None
@@ -1,17 +1,64 @@
-from typing import List, Optional
+import base64
+import csv
+import io
+import json
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import date, datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_, select
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from app.core.database import get_db
+from app.core.attendance_index import attendance_index
+from app.core.coherence import ATTENDANCE, cache_coherence
+from app.core.config import get_settings
+from app.core.database import get_db, get_read_db
+from app.core.rollup import apply_attendance_changes
+from app.core.serialization import FastJSONResponse, dumps
 from app.models.attendance import Attendance
 from app.models.students import Student
-from app.schemas.attendance import AttendanceCreate, Attendance as AttendanceSchema
+from app.schemas.attendance import (
+    AttendanceCreate,
+    AttendanceBulkCreate,
+    AttendanceBulkResult,
+    AttendanceIndexCheck,
+    AttendanceIndexStats,
+    Attendance as AttendanceSchema,
+)
 from app.api.dependencies import get_current_user
 
 router = APIRouter(prefix="/attendance", tags=["attendance"])
 
+
+def encode_cursor(record_date: date, record_id: int) -> str:
+    """Opaque keyset cursor pointing just past ``(date, id)``."""
+    raw = f"{record_date.isoformat()}:{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def apply_filters(query, student_id: Optional[int], start_date: Optional[date], end_date: Optional[date]):
+    """Apply the optional student and date range filters shared by list/export."""
+    if student_id:
+        query = query.where(Attendance.student_id == student_id)
+    if start_date:
+        query = query.where(Attendance.date >= start_date)
+    if end_date:
+        query = query.where(Attendance.date <= end_date)
+    return query
+
 @router.post("/", response_model=AttendanceSchema)
 async def mark_attendance(
     attendance: AttendanceCreate,
@@ -29,16 +76,9 @@ async def mark_attendance(
             detail="Student not found"
         )
     
-    # Check for duplicate attendance
-    stmt = select(Attendance).where(
-        and_(
-            Attendance.student_id == attendance.student_id,
-            Attendance.date == attendance.date
-        )
-    )
-    result = await db.execute(stmt)
-    existing = result.scalar_one_or_none()
-    if existing:
+    # Known duplicates are rejected from the in-memory index; anything the
+    # index misses is still caught by the uix_student_date constraint.
+    if attendance_index.loaded and attendance_index.contains(attendance.student_id, attendance.date):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Attendance already marked for this student on this date"
@@ -51,32 +91,202 @@ async def mark_attendance(
         marked_by_user_id=current_user.id
     )
     db.add(db_attendance)
-    await db.commit()
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Attendance already marked for this student on this date"
+        )
+    await apply_attendance_changes(db, [(attendance.student_id, attendance.date, 1)])
+    await cache_coherence.commit(db, ATTENDANCE)
     await db.refresh(db_attendance)
+    attendance_index.add(attendance.student_id, attendance.date)
     
     return db_attendance
 
+@router.post("/bulk", response_model=List[AttendanceBulkResult])
+async def mark_attendance_bulk(
+    payload: AttendanceBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Mark attendance for many students on one date in a single transaction.
+
+    Unknown student ids are reported as ``not_found`` and rows that already
+    exist are skipped through the ``uix_student_date`` constraint and reported
+    as ``duplicate``. One result is returned per requested student id.
+    """
+    # Preserve request order while dropping repeated ids
+    student_ids = list(dict.fromkeys(payload.student_ids))
+    if not student_ids:
+        return []
+
+    # Validate every id with one query
+    stmt = select(Student.id).where(Student.id.in_(student_ids))
+    known_ids = set((await db.scalars(stmt)).all())
+
+    inserted = {}
+    to_insert = [sid for sid in student_ids if sid in known_ids]
+    if to_insert:
+        stmt = (
+            sqlite_insert(Attendance)
+            .values([
+                {
+                    "student_id": sid,
+                    "date": payload.date,
+                    "marked_by_user_id": current_user.id,
+                }
+                for sid in to_insert
+            ])
+            .on_conflict_do_nothing(index_elements=["student_id", "date"])
+            .returning(Attendance.id, Attendance.student_id)
+        )
+        result = await db.execute(stmt)
+        inserted = {row.student_id: row.id for row in result}
+        await apply_attendance_changes(db, ((sid, payload.date, 1) for sid in inserted))
+        await cache_coherence.commit(db, ATTENDANCE)
+        for sid in inserted:
+            attendance_index.add(sid, payload.date)
+
+    results = []
+    for sid in student_ids:
+        if sid not in known_ids:
+            results.append(AttendanceBulkResult(student_id=sid, status="not_found"))
+        elif sid in inserted:
+            results.append(
+                AttendanceBulkResult(student_id=sid, status="marked", attendance_id=inserted[sid])
+            )
+        else:
+            results.append(AttendanceBulkResult(student_id=sid, status="duplicate"))
+    return results
+
 @router.get("/", response_model=List[AttendanceSchema])
 async def list_attendance(
+    response: Response,
     student_id: Optional[int] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: AsyncSession = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
-    """List attendance records with optional filtering."""
-    query = select(Attendance)
-    
-    if student_id:
-        query = query.where(Attendance.student_id == student_id)
-    if start_date:
-        query = query.where(Attendance.date >= start_date)
-    if end_date:
-        query = query.where(Attendance.date <= end_date)
+    """List attendance records with optional filtering.
+
+    Results are ordered by ``(date DESC, id DESC)`` and paginated by keyset:
+    when more rows exist the ``X-Next-Cursor`` response header carries the
+    cursor to pass back for the next page. ``limit`` is capped at
+    ``ATTENDANCE_MAX_PAGE_SIZE``.
+    """
+    settings = get_settings()
+    limit = min(limit or settings.ATTENDANCE_PAGE_SIZE, settings.ATTENDANCE_MAX_PAGE_SIZE)
+    fast = settings.FAST_LIST_RESPONSES
+    columns = (
+        select(
+            Attendance.student_id,
+            Attendance.date,
+            Attendance.id,
+            Attendance.marked_by_user_id,
+            Attendance.created_at,
+        )
+        if fast
+        else select(Attendance)
+    )
+    query = apply_filters(columns, student_id, start_date, end_date)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        query = query.where(tuple_(Attendance.date, Attendance.id) < (after_date, after_id))
     
-    query = query.order_by(Attendance.date.desc())
-    attendance_records = await db.scalars(query)
-    return attendance_records.all()
+    query = query.order_by(Attendance.date.desc(), Attendance.id.desc()).limit(limit + 1)
+    result = await db.execute(query)
+    attendance_records = result.all() if fast else result.scalars().all()
+    if len(attendance_records) > limit:
+        attendance_records = attendance_records[:limit]
+        last = attendance_records[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.date, last.id)
+    if fast:
+        body = dumps(dict(row._mapping) for row in attendance_records)
+        return FastJSONResponse(body, headers=dict(response.headers))
+    return attendance_records
+
+@router.get("/present", response_model=List[int])
+async def present_students(
+    date: date,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """Ids of the students marked present on ``date``."""
+    if attendance_index.loaded:
+        return attendance_index.present_on(date)
+    stmt = select(Attendance.student_id).where(Attendance.date == date).order_by(Attendance.student_id)
+    return (await db.scalars(stmt)).all()
+
+@router.get("/index", response_model=AttendanceIndexStats)
+async def attendance_index_stats(current_user = Depends(get_current_user)):
+    """Size and memory use of the in-memory attendance index."""
+    return attendance_index.stats()
+
+@router.post("/index/verify", response_model=AttendanceIndexCheck)
+async def verify_attendance_index(
+    repair: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """Check the in-memory index against the table, reloading it if ``repair``."""
+    report = await attendance_index.verify(db)
+    if repair and not report["consistent"]:
+        await attendance_index.load(db)
+    return report
+
+EXPORT_COLUMNS = ("id", "student_id", "date", "marked_by_user_id", "created_at")
+
+
+async def _export_rows(db: AsyncSession, query, fmt: str) -> AsyncIterator[bytes]:
+    """Encode streamed rows one ``yield_per`` partition at a time."""
+    result = await db.stream(
+        query.execution_options(yield_per=get_settings().ATTENDANCE_EXPORT_BATCH_SIZE)
+    )
+    if fmt == "csv":
+        yield (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+    async for rows in result.partitions():
+        out = io.StringIO()
+        if fmt == "csv":
+            writer = csv.writer(out)
+            for row in rows:
+                writer.writerow(
+                    [value.isoformat() if isinstance(value, (date, datetime)) else value for value in row]
+                )
+        else:
+            for row in rows:
+                out.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=lambda v: v.isoformat()))
+                out.write("\n")
+        yield out.getvalue().encode()
+
+@router.get("/export")
+async def export_attendance(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    student_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """Stream matching attendance rows as CSV or NDJSON with constant memory."""
+    query = apply_filters(
+        select(*(getattr(Attendance, column) for column in EXPORT_COLUMNS)),
+        student_id,
+        start_date,
+        end_date,
+    ).order_by(Attendance.date.desc(), Attendance.id.desc())
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(db, query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="attendance.{format}"'},
+    )
 
 @router.delete("/{attendance_id}")
 async def delete_attendance(
@@ -88,12 +298,17 @@ async def delete_attendance(
     result = await db.execute(
         Attendance.__table__.delete()
         .where(Attendance.id == attendance_id)
+        .returning(Attendance.student_id, Attendance.date)
     )
-    if result.rowcount == 0:
+    deleted = result.all()
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Attendance record not found"
         )
-    await db.commit()
+    await apply_attendance_changes(db, ((row.student_id, row.date, -1) for row in deleted))
+    await cache_coherence.commit(db, ATTENDANCE)
+    for row in deleted:
+        attendance_index.discard(row.student_id, row.date)
     
     return {"message": "Attendance record deleted successfully"}
\ No newline at end of file
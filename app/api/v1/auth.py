@@ -1,3 +1,4 @@
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -6,15 +7,24 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import principal_cache
+from app.core.coherence import SESSIONS, cache_coherence
 from app.core.config import get_settings
 from app.core.database import get_db
-from app.core.security import create_access_token, verify_password
+from app.core.last_seen import last_seen_buffer
+from app.core.security import (
+    create_access_token,
+    new_session_id,
+    session_key,
+    token_session_key,
+    verify_password_async,
+)
 from app.models.users import User
 from app.models.sessions import Session
 from app.schemas.users import UserLogin, User as UserSchema
 
 router = APIRouter(prefix="/auth", tags=["auth"])
-settings = get_settings()
+logger = logging.getLogger(__name__)
 
 @router.post("/login")
 async def login(
@@ -24,20 +34,29 @@ async def login(
     db: AsyncSession = Depends(get_db)
 ):
     """Authenticate user and create a new session."""
+    settings = get_settings()
      # Find user
     stmt = select(User).where(User.username == form_data.username)
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
 
-    # Check active sessions count
+    # The flush commits, or rolls back and expires ``user`` if it fails
+    user_id, username = user.id, user.username
+
+    # Check active sessions count against up-to-date last_seen values. A
+    # failed flush keeps them buffered; count with the stored ones instead.
+    try:
+        await last_seen_buffer.flush(db)
+    except Exception:
+        logger.exception("Failed to flush session last_seen updates before login")
     stmt = select(func.count()).select_from(Session).where(
-        Session.user_id == user.id,
+        Session.user_id == user_id,
         Session.last_seen > datetime.utcnow() - timedelta(minutes=settings.SESSION_CLEANUP_MINUTES),
     )
     active_sessions = await db.scalar(stmt)
@@ -49,15 +68,17 @@ async def login(
         )
 
     # Create access token
+    jti = new_session_id()
     access_token = create_access_token(
-        data={"sub": user.username}
+        data={"sub": username},
+        jti=jti
     )
 
     # Create session
     session = Session(
-        user_id=user.id,
+        user_id=user_id,
         device_name=request.headers.get("User-Agent", "Unknown Device"),
-        session_token=access_token,
+        session_key=session_key(access_token, jti),
         ip_address=request.client.host,
         user_agent=request.headers.get("User-Agent")
     )
@@ -87,9 +108,10 @@ async def logout(
     session_token = request.cookies.get("session")
     if session_token:
         await db.execute(
-            Session.__table__.delete().where(Session.session_token == session_token)
+            Session.__table__.delete().where(Session.session_key == token_session_key(session_token))
         )
-        await db.commit()
+        await cache_coherence.commit(db, SESSIONS)
+        principal_cache.invalidate_token(session_token)
         response.delete_cookie(key="session")
     
     return {"message": "Successfully logged out"}
\ No newline at end of file
@@ -0,0 +1,250 @@
+import asyncio
+import re
+import zipfile
+from collections import defaultdict, deque
+from datetime import date
+from decimal import Decimal
+from typing import AsyncIterator, Iterable, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.core.database import get_read_db
+from app.core.fees import fee_periods
+from app.core.pdf import get_report_executor, render_student_report, report_worker_count
+from app.models.attendance import Attendance
+from app.models.students import Student
+from app.schemas.reports import (
+    FeePeriod as FeePeriodSchema,
+    FeeReport,
+    IndividualReportRequest,
+    StudentFees,
+    StudentSummary,
+    SummaryReport,
+)
+from app.api.dependencies import get_current_user
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+def _check_range(start_date: date, end_date: date) -> None:
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be earlier than start_date"
+        )
+
+
+@router.get("/summary", response_model=SummaryReport)
+async def attendance_summary(
+    start_date: date,
+    end_date: date,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """Classes attended and total fee per student over a date range.
+
+    Fees charge each class at the price in effect on its date;
+    ``price_per_class`` is the current price.
+    """
+    _check_range(start_date, end_date)
+
+    periods = await fee_periods(db, start_date, end_date)
+    stmt = (
+        select(Student.id, Student.name, Student.level, Student.price_per_class)
+        .order_by(Student.name)
+    )
+    result = await db.execute(stmt)
+
+    students = []
+    grand_total = Decimal("0.00")
+    for row in result:
+        student_periods = periods.get(row.id, [])
+        total_fee = sum((p.fee for p in student_periods), Decimal("0.00"))
+        grand_total += total_fee
+        students.append(
+            StudentSummary(
+                student_id=row.id,
+                name=row.name,
+                level=row.level,
+                classes_attended=sum(p.classes for p in student_periods),
+                price_per_class=Decimal(row.price_per_class),
+                total_fee=total_fee,
+            )
+        )
+
+    return SummaryReport(
+        start_date=start_date,
+        end_date=end_date,
+        students=students,
+        grand_total=grand_total,
+    )
+
+
+@router.get("/fees", response_model=FeeReport)
+async def fees_report(
+    start_date: date,
+    end_date: date,
+    student_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """Fees per student split by the prices in effect over a date range."""
+    _check_range(start_date, end_date)
+
+    student_ids = None if student_id is None else [student_id]
+    periods = await fee_periods(db, start_date, end_date, student_ids)
+    stmt = select(Student.id, Student.name, Student.level).order_by(Student.name)
+    if student_id is not None:
+        stmt = stmt.where(Student.id == student_id)
+    rows = (await db.execute(stmt)).all()
+    if student_id is not None and not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found"
+        )
+
+    students = []
+    grand_total = Decimal("0.00")
+    for row in rows:
+        student_periods = [
+            FeePeriodSchema(
+                start_date=p.start,
+                end_date=p.end,
+                price_per_class=p.price,
+                classes_attended=p.classes,
+                fee=p.fee,
+            )
+            for p in periods.get(row.id, [])
+        ]
+        total_fee = sum((p.fee for p in student_periods), Decimal("0.00"))
+        grand_total += total_fee
+        students.append(
+            StudentFees(
+                student_id=row.id,
+                name=row.name,
+                level=row.level,
+                classes_attended=sum(p.classes_attended for p in student_periods),
+                total_fee=total_fee,
+                periods=student_periods,
+            )
+        )
+
+    return FeeReport(
+        start_date=start_date,
+        end_date=end_date,
+        students=students,
+        grand_total=grand_total,
+    )
+
+
+class _ZipChunkBuffer:
+    """Write-only sink that lets ``zipfile`` stream into response chunks."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _render_pdfs(jobs: Iterable[Tuple[str, tuple]]) -> AsyncIterator[Tuple[str, bytes]]:
+    """Render PDFs in the process pool, yielding them in order.
+
+    At most two jobs per worker are in flight so memory stays bounded no
+    matter how many students were selected.
+    """
+    loop = asyncio.get_running_loop()
+    workers = get_settings().REPORT_PDF_WORKERS
+    executor = get_report_executor(workers)
+    window = report_worker_count(workers) * 2
+    pending = deque()
+    try:
+        for filename, args in jobs:
+            pending.append((filename, loop.run_in_executor(executor, render_student_report, *args)))
+            if len(pending) >= window:
+                filename, future = pending.popleft()
+                yield filename, await future
+        while pending:
+            filename, future = pending.popleft()
+            yield filename, await future
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+async def _stream_zip(jobs: Iterable[Tuple[str, tuple]]) -> AsyncIterator[bytes]:
+    buffer = _ZipChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for filename, pdf in _render_pdfs(jobs):
+            archive.writestr(filename, pdf)
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+@router.post("/individual.zip")
+async def individual_reports_zip(
+    payload: IndividualReportRequest,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """Stream a ZIP with one individual report PDF per selected student."""
+    _check_range(payload.start_date, payload.end_date)
+    student_ids = list(dict.fromkeys(payload.student_ids))
+    if not student_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Select at least one student"
+        )
+
+    stmt = (
+        select(Student.id, Student.name, Student.level)
+        .where(Student.id.in_(student_ids))
+        .order_by(Student.name)
+    )
+    students = (await db.execute(stmt)).all()
+    periods = await fee_periods(db, payload.start_date, payload.end_date, student_ids)
+
+    # Attendance for every selected student in a single query
+    stmt = (
+        select(Attendance.student_id, Attendance.date)
+        .where(
+            Attendance.student_id.in_(student_ids),
+            Attendance.date >= payload.start_date,
+            Attendance.date <= payload.end_date,
+        )
+        .order_by(Attendance.student_id, Attendance.date)
+    )
+    dates_by_student = defaultdict(list)
+    for student_id, day in await db.execute(stmt):
+        dates_by_student[student_id].append(day)
+
+    jobs = (
+        (
+            f"attendance-report-{re.sub(r'[^A-Za-z0-9_-]+', '_', s.name)}-{s.id}.pdf",
+            (
+                s.name,
+                s.level,
+                [(p.start, p.end, p.price, p.classes) for p in periods.get(s.id, [])],
+                payload.start_date,
+                payload.end_date,
+                dates_by_student.get(s.id, []),
+            ),
+        )
+        for s in students
+    )
+    return StreamingResponse(
+        _stream_zip(jobs),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="attendance-reports.zip"'},
+    )
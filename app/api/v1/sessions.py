@@ -2,8 +2,11 @@ from typing import Optional, List
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import principal_cache
+from app.core.coherence import SESSIONS, cache_coherence
 from app.core.database import get_db
 from app.models.sessions import Session
 from app.schemas.sessions import Session as SessionSchema
@@ -18,7 +21,7 @@ async def list_sessions(
 ):
     """List all active sessions for the current user."""
     sessions = await db.scalars(
-        Session.__table__.select()
+        select(Session)
         .where(Session.user_id == current_user.id)
         .order_by(Session.last_seen.desc())
     )
@@ -44,6 +47,7 @@ async def revoke_session(
         )
     
     await db.execute(Session.__table__.delete().where(Session.id == session_id))
-    await db.commit()
+    await cache_coherence.commit(db, SESSIONS)
+    principal_cache.invalidate_session(session_id)
     
     return {"message": "Session revoked successfully"}
\ No newline at end of file
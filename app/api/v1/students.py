@@ -1,15 +1,51 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import codecs
+import csv
+from collections import deque
+from datetime import date
+from decimal import Decimal
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, Depends, File, HTTPException, Request, Response, UploadFile, status
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.models.students import Student
-from app.schemas.students import StudentCreate, StudentUpdate, Student as StudentSchema
+from app.core.attendance_index import attendance_index
+from app.core.cache import etag_matches, roster_version
+from app.core.coherence import ATTENDANCE, ROSTER, cache_coherence
+from app.core.config import get_settings
+from app.core.database import get_db, get_read_db
+from app.core.security import decrypt_ages, encrypt_ages
+from app.core.serialization import FastJSONResponse, dumps
+from app.models.attendance import Attendance, AttendanceMonthly
+from app.models.students import PRICE_HISTORY_START, Student, StudentPrice
+from app.schemas.students import (
+    StudentCreate,
+    StudentImportReport,
+    StudentImportRowError,
+    StudentPriceCreate,
+    StudentUpdate,
+    Student as StudentSchema,
+    StudentPrice as StudentPriceSchema,
+)
 from app.api.dependencies import get_current_user
-from sqlalchemy import select
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 router = APIRouter(prefix="/students", tags=["students"])
 
+# Clients must revalidate, which is a cheap version check thanks to the ETag
+ROSTER_CACHE_CONTROL = "private, no-cache"
+
+
+def not_modified(request: Request, etag: str):
+    """Return a 304 response when the client already holds ``etag``."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": ROSTER_CACHE_CONTROL},
+        )
+    return None
+
 @router.post("/", response_model=StudentSchema)
 async def create_student(
     student: StudentCreate,
@@ -25,30 +61,258 @@ async def create_student(
     db_student.set_age(student.age)
     
     db.add(db_student)
-    await db.commit()
+    await cache_coherence.commit(db, ROSTER)
+    roster_version.bump()
     await db.refresh(db_student)
     
     return db_student
 
+IMPORT_COLUMNS = ("name", "age", "level", "price_per_class")
+IMPORT_READ_SIZE = 64 * 1024
+
+
+class _LineFeed:
+    """Lines handed to a single ``csv.reader`` as the upload arrives."""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _csv_records(upload: UploadFile) -> AsyncIterator[List[str]]:
+    """Parse an uploaded CSV incrementally, one read chunk at a time."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    pending = ""
+    quotes = 0
+    while True:
+        chunk = await upload.read(IMPORT_READ_SIZE)
+        try:
+            text = pending + decoder.decode(chunk, final=not chunk)
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="CSV file must be UTF-8 encoded"
+            )
+        # Split on "\n" only; the reader handles "\r\n" and any other
+        # characters inside fields. A trailing partial line waits for the
+        # next chunk.
+        lines = text.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            feed.lines.append(line + "\n")
+            quotes += line.count('"')
+            # Only drain the reader outside a quoted field, so a record with
+            # embedded newlines is never cut short by an empty feed
+            if quotes % 2 == 0:
+                for record in reader:
+                    yield record
+                quotes = 0
+        if not chunk:
+            if pending:
+                feed.lines.append(pending)
+            for record in reader:
+                yield record
+            return
+
+
+def _import_error(error: dict) -> str:
+    field = error["loc"][0]
+    if error["type"] == "int_parsing":
+        return f"{field} must be an integer"
+    if error["type"] == "decimal_parsing":
+        return f"{field} must be a number"
+    return f"{field}: {error['msg']}"
+
+
+def _parse_import_row(record: List[str], positions: dict) -> Tuple[Optional[dict], List[str]]:
+    """Validate one CSV record with the API schema and the ``Student`` rules."""
+    values = {
+        column: record[index].strip() if index < len(record) else ""
+        for column, index in positions.items()
+    }
+    errors = []
+    invalid = set()
+    try:
+        student = StudentCreate.model_validate(values)
+    except ValidationError as exc:
+        student = None
+        for error in exc.errors():
+            invalid.add(error["loc"][0])
+            errors.append(_import_error(error))
+    try:
+        Student.validate_name(values["name"])
+    except ValueError as exc:
+        errors.append(str(exc))
+    if "price_per_class" not in invalid:
+        try:
+            Student.validate_price(values["price_per_class"])
+        except ValueError as exc:
+            errors.append(str(exc))
+    if not values["level"]:
+        errors.append("level must not be empty")
+    if errors:
+        return None, errors
+    return student.model_dump(), []
+
+
+async def _insert_students(db: AsyncSession, rows: List[dict]) -> int:
+    """Encrypt one batch of ages off the event loop and insert it in one transaction."""
+    ciphertexts = await asyncio.to_thread(encrypt_ages, [row["age"] for row in rows])
+    created = await db.execute(
+        insert(Student).returning(Student.id, Student.price_per_class),
+        [
+            {
+                "name": row["name"],
+                "age_ciphertext": ciphertext,
+                "level": row["level"],
+                "price_per_class": row["price_per_class"],
+            }
+            for row, ciphertext in zip(rows, ciphertexts)
+        ],
+    )
+    await db.execute(
+        insert(StudentPrice),
+        [
+            {"student_id": student_id, "effective_from": PRICE_HISTORY_START, "price": price}
+            for student_id, price in created
+        ],
+    )
+    await cache_coherence.commit(db, ROSTER)
+    return len(rows)
+
+@router.post("/import", response_model=StudentImportReport)
+async def import_students(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Create students from an uploaded CSV.
+
+    The file needs a header with ``name``, ``age``, ``level`` and
+    ``price_per_class`` columns. Valid rows are inserted in transactions of
+    ``STUDENT_IMPORT_BATCH_SIZE``; invalid rows are skipped and reported by
+    record number.
+    """
+    batch_size = get_settings().STUDENT_IMPORT_BATCH_SIZE
+    records = _csv_records(file)
+    header = await anext(records, None)
+    if header is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV file is empty"
+        )
+    header = [column.strip().lower() for column in header]
+    missing = [column for column in IMPORT_COLUMNS if column not in header]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV is missing columns: {', '.join(missing)}"
+        )
+    positions = {column: header.index(column) for column in IMPORT_COLUMNS}
+
+    imported = 0
+    errors = []
+    batch = []
+    row_number = 1
+    try:
+        async for record in records:
+            row_number += 1
+            if not any(field.strip() for field in record):
+                continue
+            row, row_errors = _parse_import_row(record, positions)
+            if row_errors:
+                errors.append(StudentImportRowError(row=row_number, errors=row_errors))
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                imported += await _insert_students(db, batch)
+                batch = []
+        if batch:
+            imported += await _insert_students(db, batch)
+    finally:
+        # Earlier batches are already committed and visible
+        if imported:
+            roster_version.bump()
+
+    return StudentImportReport(imported=imported, failed=len(errors), errors=errors)
+
 @router.get("/", response_model=List[StudentSchema])
 async def list_students(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """List all students."""
+    etag = roster_version.etag("list", skip, limit)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = ROSTER_CACHE_CONTROL
+
+    if get_settings().FAST_LIST_RESPONSES:
+        # Plain row tuples, batch decryption and direct encoding (same schema)
+        stmt = (
+            select(
+                Student.name,
+                Student.age_ciphertext,
+                Student.level,
+                Student.price_per_class,
+                Student.id,
+                Student.created_at,
+                Student.updated_at,
+            )
+            .order_by(Student.name)
+            .offset(skip)
+            .limit(limit)
+        )
+        rows = (await db.execute(stmt)).all()
+        ages = decrypt_ages([row.age_ciphertext for row in rows])
+        body = dumps(
+            {
+                "name": row.name,
+                "age": age,
+                "level": row.level,
+                "price_per_class": row.price_per_class,
+                "id": row.id,
+                "created_at": row.created_at,
+                "updated_at": row.updated_at,
+            }
+            for row, age in zip(rows, ages)
+        )
+        return FastJSONResponse(body, headers=dict(response.headers))
+
     stmt = select(Student).order_by(Student.name).offset(skip).limit(limit)
-    students = await db.scalars(stmt)
-    return students.all()
+    students = (await db.scalars(stmt)).all()
+    Student.prefetch_ages(students)
+    return students
 
 @router.get("/{student_id}", response_model=StudentSchema)
 async def get_student(
     student_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """Get a specific student by ID."""
+    etag = roster_version.etag("student", student_id)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
     stmt = select(Student).where(Student.id == student_id)
     result = await db.execute(stmt)
     student = result.scalar_one_or_none()
@@ -57,6 +321,8 @@ async def get_student(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found"
         )
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = ROSTER_CACHE_CONTROL
     return student
 
 @router.put("/{student_id}", response_model=StudentSchema)
@@ -83,30 +349,130 @@ async def update_student(
         db_student.set_age(student.age)
     if student.level is not None:
         db_student.level = student.level
-    if student.price_per_class is not None:
-        db_student.price_per_class = student.price_per_class
+    if student.price_per_class is not None and student.price_per_class != db_student.price_per_class:
+        # A new price applies from today on; earlier classes keep their price
+        db_student.price_per_class = await _set_price(
+            db, student_id, date.today(), student.price_per_class
+        )
     
-    await db.commit()
+    await cache_coherence.commit(db, ROSTER)
+    roster_version.bump()
     await db.refresh(db_student)
     
     return db_student
 
+async def _set_price(db: AsyncSession, student_id: int, effective_from: date, price: Decimal) -> Decimal:
+    """Record ``price`` from ``effective_from`` on; returns the price in effect today.
+
+    Does not commit.
+    """
+    stmt = sqlite_insert(StudentPrice).values(
+        student_id=student_id, effective_from=effective_from, price=price
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[StudentPrice.student_id, StudentPrice.effective_from],
+            set_={"price": stmt.excluded.price},
+        )
+    )
+    stmt = (
+        select(StudentPrice.price)
+        .where(StudentPrice.student_id == student_id, StudentPrice.effective_from <= date.today())
+        .order_by(StudentPrice.effective_from.desc())
+        .limit(1)
+    )
+    return (await db.execute(stmt)).scalar_one()
+
+async def _price_history(db: AsyncSession, student_id: int) -> List[StudentPrice]:
+    stmt = (
+        select(StudentPrice)
+        .where(StudentPrice.student_id == student_id)
+        .order_by(StudentPrice.effective_from)
+    )
+    return (await db.scalars(stmt)).all()
+
+@router.get("/{student_id}/prices", response_model=List[StudentPriceSchema])
+async def list_student_prices(
+    student_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """A student's price history, oldest first."""
+    prices = await _price_history(db, student_id)
+    if not prices:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found"
+        )
+    return prices
+
+@router.post("/{student_id}/prices", response_model=List[StudentPriceSchema])
+async def set_student_price(
+    student_id: int,
+    price: StudentPriceCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Set the price from ``effective_from`` on, e.g. to backdate a change.
+
+    Replaces the price starting on that exact date, if any. Fees for classes
+    on or after ``effective_from`` (up to the next price change) follow it.
+    Future dates are rejected because ``price_per_class`` is the price in
+    effect today.
+    """
+    if price.price <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="price must be positive"
+        )
+    if price.effective_from > date.today():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="effective_from must not be in the future"
+        )
+    db_student = await db.get(Student, student_id)
+    if not db_student:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found"
+        )
+    db_student.price_per_class = await _set_price(db, student_id, price.effective_from, price.price)
+    await cache_coherence.commit(db, ROSTER)
+    roster_version.bump()
+    return await _price_history(db, student_id)
+
 @router.delete("/{student_id}")
 async def delete_student(
     student_id: int,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Delete a student."""
+    """Delete a student together with their attendance records."""
+    # Attendance and prices reference the student, so they go first with foreign keys on
+    await db.execute(
+        StudentPrice.__table__.delete()
+        .where(StudentPrice.student_id == student_id)
+    )
+    await db.execute(
+        AttendanceMonthly.__table__.delete()
+        .where(AttendanceMonthly.student_id == student_id)
+    )
+    await db.execute(
+        Attendance.__table__.delete()
+        .where(Attendance.student_id == student_id)
+    )
     result = await db.execute(
         Student.__table__.delete()
         .where(Student.id == student_id)
     )
     if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found"
         )
-    await db.commit()
+    await cache_coherence.commit(db, ROSTER, ATTENDANCE)
+    roster_version.bump()
+    attendance_index.remove_student(student_id)
     
     return {"message": "Student deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,106 @@
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+
+from .compression import brotli, choose_encoding
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Only text assets benefit from precompression
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".json", ".txt", ".map"}
+
+
+@dataclass(frozen=True)
+class Asset:
+    media_type: str
+    etag: str
+    variants: Dict[str, bytes]  # "identity", plus "gzip" and "br" for text assets
+
+
+class AssetManifest:
+    """Content-hashed names and precompressed variants for static assets.
+
+    ``css/styles.css`` is published as ``css/styles.<hash>.css``; since the
+    name changes whenever the content does, responses can be cached forever.
+    The manifest is built once (lazily or at startup) and kept in memory.
+    Text assets are precompressed with gzip and, with the ``brotli``
+    package installed (a declared dependency), brotli.
+    """
+
+    def __init__(self, directory: Path, hash_length: int = 12):
+        self.directory = Path(directory)
+        self.hash_length = hash_length
+        self._urls: Optional[Dict[str, str]] = None
+        self._assets: Dict[str, Asset] = {}
+
+    def build(self) -> None:
+        urls, assets = {}, {}
+        for path in sorted(self.directory.rglob("*")):
+            if not path.is_file():
+                continue
+            content = path.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()[: self.hash_length]
+            logical = path.relative_to(self.directory).as_posix()
+            hashed = path.with_name(f"{path.stem}.{digest}{path.suffix}")
+            hashed = hashed.relative_to(self.directory).as_posix()
+
+            variants = {"identity": content}
+            if path.suffix in COMPRESSIBLE_SUFFIXES:
+                variants["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+                if brotli is not None:
+                    variants["br"] = brotli.compress(content, quality=11)
+            media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            urls[logical] = hashed
+            assets[hashed] = Asset(media_type=media_type, etag=f'"{digest}"', variants=variants)
+        self._urls, self._assets = urls, assets
+
+    def hashed_path(self, path: str) -> str:
+        if self._urls is None:
+            self.build()
+        return self._urls.get(path, path)
+
+    def get(self, hashed_path: str) -> Optional[Asset]:
+        if self._urls is None:
+            self.build()
+        return self._assets.get(hashed_path)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """``StaticFiles`` that serves fingerprinted names from the manifest.
+
+    Hashed URLs get immutable far-future caching and a precompressed body
+    chosen from ``Accept-Encoding``; anything else falls back to the regular
+    file lookup.
+    """
+
+    def __init__(self, *, directory: Path, manifest: AssetManifest, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.manifest.get(path.replace("\\", "/"))
+        if asset is None:
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "ETag": asset.etag,
+            "Vary": "Accept-Encoding",
+        }
+        if request_headers.get("if-none-match") == asset.etag:
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding not in asset.variants:
+            encoding = "identity"
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(asset.variants[encoding], media_type=asset.media_type, headers=headers)
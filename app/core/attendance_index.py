@@ -0,0 +1,258 @@
+"""In-process attendance bitmap index.
+
+Each student maps to a set of fixed-size ``bytearray`` chunks; bit ``n`` of
+chunk ``k`` is set when the student attended on ``EPOCH + k * CHUNK_DAYS + n``
+days. Membership tests, range counts and "who was present" lookups are
+answered from memory without touching SQLite.
+
+The index is loaded once at startup and kept current by the attendance
+endpoints after each commit. Until it is loaded, callers fall back to the
+database. With several workers, a change committed by another worker marks
+the index stale (callers fall back again) and schedules a debounced reload.
+All mutation happens on the event loop, so no locking is needed.
+"""
+import asyncio
+import logging
+import sys
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.attendance import Attendance
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+CHUNK_DAYS = 512
+CHUNK_BYTES = CHUNK_DAYS // 8
+
+
+def _locate(day: date) -> Tuple[int, int]:
+    """Chunk number and bit position of ``day``."""
+    return divmod((day - EPOCH).days, CHUNK_DAYS)
+
+
+def _day(chunk_no: int, bit: int) -> date:
+    return EPOCH + timedelta(days=chunk_no * CHUNK_DAYS + bit)
+
+
+class AttendanceBitmapIndex:
+    """student_id -> {chunk number -> bitmap of attended days}."""
+
+    def __init__(self):
+        self._students: Dict[int, Dict[int, bytearray]] = {}
+        self.loaded = False
+        self.reloads = 0
+        # Bumped by invalidate(); a load that overlaps an invalidation stays stale
+        self._generation = 0
+        # Changes made while a load is streaming, replayed onto the new contents
+        self._journal: Optional[list] = None
+        self._reload_task: Optional[asyncio.Task] = None
+
+    def _record(self, method, *args) -> None:
+        if self._journal is not None:
+            self._journal.append((method, args))
+
+    def add(self, student_id: int, day: date) -> bool:
+        """Set the bit for ``day``; returns False if it was already set."""
+        self._record(AttendanceBitmapIndex.add, student_id, day)
+        chunk_no, bit = _locate(day)
+        chunks = self._students.setdefault(student_id, {})
+        chunk = chunks.get(chunk_no)
+        if chunk is None:
+            chunk = chunks[chunk_no] = bytearray(CHUNK_BYTES)
+        mask = 1 << (bit & 7)
+        if chunk[bit >> 3] & mask:
+            return False
+        chunk[bit >> 3] |= mask
+        return True
+
+    def discard(self, student_id: int, day: date) -> bool:
+        """Clear the bit for ``day``; returns False if it was not set."""
+        self._record(AttendanceBitmapIndex.discard, student_id, day)
+        chunks = self._students.get(student_id)
+        if not chunks:
+            return False
+        chunk_no, bit = _locate(day)
+        chunk = chunks.get(chunk_no)
+        mask = 1 << (bit & 7)
+        if chunk is None or not chunk[bit >> 3] & mask:
+            return False
+        chunk[bit >> 3] &= ~mask
+        # Drop empty chunks and students so memory follows the live data
+        if not any(chunk):
+            del chunks[chunk_no]
+            if not chunks:
+                del self._students[student_id]
+        return True
+
+    def remove_student(self, student_id: int) -> None:
+        self._record(AttendanceBitmapIndex.remove_student, student_id)
+        self._students.pop(student_id, None)
+
+    def contains(self, student_id: int, day: date) -> bool:
+        chunks = self._students.get(student_id)
+        if not chunks:
+            return False
+        chunk_no, bit = _locate(day)
+        chunk = chunks.get(chunk_no)
+        return chunk is not None and bool(chunk[bit >> 3] & (1 << (bit & 7)))
+
+    def count(self, student_id: int, start: date, end: date) -> int:
+        """Classes attended by ``student_id`` in ``[start, end]``."""
+        chunks = self._students.get(student_id)
+        if not chunks or end < start:
+            return 0
+        first_chunk, first_bit = _locate(start)
+        last_chunk, last_bit = _locate(end)
+        total = 0
+        for chunk_no, chunk in chunks.items():
+            if chunk_no < first_chunk or chunk_no > last_chunk:
+                continue
+            value = int.from_bytes(chunk, "little")
+            if chunk_no == first_chunk:
+                value >>= first_bit
+                value <<= first_bit
+            if chunk_no == last_chunk:
+                value &= (1 << (last_bit + 1)) - 1
+            total += value.bit_count()
+        return total
+
+    def counts(self, start: date, end: date, student_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+        """Range counts per student; students with no classes are omitted."""
+        ids = self._students.keys() if student_ids is None else student_ids
+        result = {}
+        for student_id in ids:
+            count = self.count(student_id, start, end)
+            if count:
+                result[student_id] = count
+        return result
+
+    def present_on(self, day: date) -> List[int]:
+        """Sorted ids of the students marked present on ``day``."""
+        chunk_no, bit = _locate(day)
+        byte, mask = bit >> 3, 1 << (bit & 7)
+        return sorted(
+            student_id
+            for student_id, chunks in self._students.items()
+            if chunk_no in chunks and chunks[chunk_no][byte] & mask
+        )
+
+    def clear(self) -> None:
+        self._students.clear()
+        self.loaded = False
+
+    def invalidate(self) -> None:
+        """Mark the contents stale; callers use SQLite until the next load."""
+        self._generation += 1
+        self.loaded = False
+
+    async def load(self, db: AsyncSession, batch_size: int = 5000) -> int:
+        """Replace the index contents with every row of ``attendance``."""
+        generation = self._generation
+        fresh = AttendanceBitmapIndex()
+        rows = 0
+        self._journal = []
+        try:
+            result = await db.stream(
+                select(Attendance.student_id, Attendance.date).execution_options(yield_per=batch_size)
+            )
+            async for partition in result.partitions():
+                for student_id, day in partition:
+                    fresh.add(student_id, day)
+                    rows += 1
+        finally:
+            journal, self._journal = self._journal, None
+        self._students = fresh._students
+        for method, args in journal:
+            method(self, *args)
+        self.loaded = generation == self._generation
+        return rows
+
+    def reload_soon(self, session_factory, delay: float) -> None:
+        """Invalidate now and reload after ``delay`` seconds, coalescing bursts."""
+        self.invalidate()
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.create_task(self._reload(session_factory, delay))
+
+    async def _reload(self, session_factory, delay: float) -> None:
+        while not self.loaded:
+            await asyncio.sleep(delay)
+            generation = self._generation
+            await self.load_from(session_factory)
+            self.reloads += 1
+            if generation == self._generation and not self.loaded:
+                return  # the load itself failed; stay on SQLite
+
+    async def stop(self) -> None:
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+
+    async def verify(self, db: AsyncSession, limit: int = 100) -> dict:
+        """Compare the index against the table.
+
+        ``missing`` are rows in the table that the index lacks and ``extra``
+        are days the index holds that the table does not; at most ``limit``
+        of each are listed.
+        """
+        expected = AttendanceBitmapIndex()
+        await expected.load(db)
+        report = {"missing": [], "extra": [], "missing_count": 0, "extra_count": 0}
+        for student_id in expected._students.keys() | self._students.keys():
+            want = expected._students.get(student_id, {})
+            have = self._students.get(student_id, {})
+            for chunk_no in want.keys() | have.keys():
+                want_bits = int.from_bytes(want.get(chunk_no, b""), "little")
+                have_bits = int.from_bytes(have.get(chunk_no, b""), "little")
+                for kind, bits in (("missing", want_bits & ~have_bits), ("extra", have_bits & ~want_bits)):
+                    report[f"{kind}_count"] += bits.bit_count()
+                    while bits and len(report[kind]) < limit:
+                        low = bits & -bits
+                        report[kind].append(
+                            {"student_id": student_id, "date": _day(chunk_no, low.bit_length() - 1)}
+                        )
+                        bits ^= low
+        report["consistent"] = not (report["missing_count"] or report["extra_count"])
+        return report
+
+    def stats(self) -> dict:
+        chunk_count = sum(len(chunks) for chunks in self._students.values())
+        bitmap_bytes = chunk_count * CHUNK_BYTES
+        # Bitmaps plus the dict/bytearray object overhead around them
+        approx_bytes = sys.getsizeof(self._students) + sum(
+            sys.getsizeof(chunks) + sum(sys.getsizeof(chunk) for chunk in chunks.values())
+            for chunks in self._students.values()
+        )
+        return {
+            "loaded": self.loaded,
+            "reloads": self.reloads,
+            "students": len(self._students),
+            "chunks": chunk_count,
+            "days_marked": sum(
+                int.from_bytes(chunk, "little").bit_count()
+                for chunks in self._students.values()
+                for chunk in chunks.values()
+            ),
+            "bitmap_bytes": bitmap_bytes,
+            "approx_bytes": approx_bytes,
+        }
+
+    async def load_from(self, session_factory) -> None:
+        """Startup load; on failure the index stays unloaded and callers use SQLite."""
+        try:
+            async with session_factory() as db:
+                rows = await self.load(db)
+        except Exception:
+            logger.exception("Failed to load the attendance index")
+            return
+        logger.info("Attendance index loaded: %d rows, %s", rows, self.stats())
+
+
+attendance_index = AttendanceBitmapIndex()
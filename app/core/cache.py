@@ -0,0 +1,187 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Small bounded LRU cache with optional per-entry expiry.
+
+    Entries are evicted least-recently-used first once ``maxsize`` is reached.
+    ``ttl`` (seconds) is the default lifetime of an entry; ``None`` keeps
+    entries until they are evicted or invalidated. Hit/miss counters are kept
+    so callers can report cache effectiveness.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Remove every entry for which ``predicate(key, value)`` is true."""
+        with self._lock:
+            keys = [k for k, (v, _) in self._data.items() if predicate(k, v)]
+            for k in keys:
+                del self._data[k]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class VersionCounter:
+    """Monotonic data version used to build strong ETags.
+
+    The random epoch keeps ETags from colliding across process restarts,
+    when the counter starts again from zero. With several workers the
+    version is taken from the shared counter instead (``sync``), so every
+    worker issues the same ETag for the same data; ``bump`` then leaves the
+    value to the next sync.
+    """
+
+    def __init__(self):
+        self.epoch = secrets.token_hex(4)
+        self.value = 0
+        self.shared = False
+
+    def bump(self) -> int:
+        if not self.shared:
+            self.value += 1
+        return self.value
+
+    def sync(self, value: int, epoch: Optional[str] = None) -> None:
+        self.value = value
+        if epoch is not None:
+            self.epoch = epoch
+        self.shared = True
+
+    def etag(self, *parts: Any) -> str:
+        suffix = "".join(f".{p}" for p in parts)
+        return f'"{self.epoch}.{self.value}{suffix}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compare an ``If-None-Match`` header against ``etag``.
+
+    Encoding suffixes added by the compression middleware (``-gzip``/``-br``)
+    are ignored, as are weak-validator prefixes.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        for suffix in ('-gzip"', '-br"'):
+            if candidate.endswith(suffix):
+                candidate = candidate[: -len(suffix)] + '"'
+        if candidate == etag:
+            return True
+    return False
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Resolved identity for an access token."""
+    user: Any
+    session_id: int
+
+
+class PrincipalCache:
+    """Token -> authenticated principal cache used by ``get_current_user``.
+
+    Entries never outlive the token's own ``exp`` claim. Logout and session
+    revocation must call ``invalidate_token``/``invalidate_session`` so a
+    revoked token is rejected on the very next request.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def configure(self, maxsize: int, ttl: float) -> None:
+        self._cache.maxsize = maxsize
+        self._cache.ttl = ttl
+
+    def get(self, token: str) -> Optional[Principal]:
+        return self._cache.get(token)
+
+    def set(self, token: str, principal: Principal, token_exp: Optional[float] = None) -> None:
+        ttl = self._cache.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+        self._cache.set(token, principal, ttl=ttl)
+
+    def invalidate_token(self, token: str) -> None:
+        self._cache.pop(token)
+
+    def invalidate_session(self, session_id: int) -> None:
+        self._cache.discard_where(lambda _, p: p.session_id == session_id)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._cache.discard_where(lambda _, p: p.user.id == user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+
+roster_version = VersionCounter()
+
+# Caches nothing until create_app() applies the PRINCIPAL_CACHE_* settings
+principal_cache = PrincipalCache(maxsize=0, ttl=0)
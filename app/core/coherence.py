@@ -0,0 +1,198 @@
+"""Cross-process cache coherence for multi-worker deployments.
+
+Each worker keeps its own principal cache, roster ETag version and attendance
+index. Writers bump a per-namespace counter in ``cache_versions`` inside the
+same transaction as their change (``CacheCoherence.commit``). Before each
+request a worker asks SQLite for ``PRAGMA data_version`` on a dedicated
+connection; the value only moves when another connection has committed, so
+the common case is a single in-memory pragma. When it moves, the counters are
+re-read and the handlers subscribed to changed namespaces run.
+
+Handlers receive the new version and whether the change was this worker's own
+commit, which it already applied to its caches. The decrypted-age cache is
+keyed by ciphertext and never goes stale, so it needs no signal.
+"""
+import logging
+import secrets
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.models.cache_versions import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+ROSTER = "roster"
+SESSIONS = "sessions"
+ATTENDANCE = "attendance"
+EPOCH = "epoch"
+
+Handler = Callable[[int, bool], None]
+
+
+def sqlite_database_path(url: str) -> Optional[str]:
+    """File path behind a SQLite URL, or None for other backends and ``:memory:``."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return parsed.database
+
+
+class CacheCoherence:
+    """Per-worker view of the shared ``cache_versions`` counters."""
+
+    def __init__(self, check_interval: float = 0.0):
+        self.check_interval = check_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._last_check = 0.0
+        self.checks = 0
+        self.refreshes = 0
+        self.remote_changes = 0
+
+    @property
+    def active(self) -> bool:
+        return self._conn is not None
+
+    def subscribe(self, name: str, handler: Handler) -> None:
+        if handler not in self._handlers[name]:
+            self._handlers[name].append(handler)
+
+    def version(self, name: str) -> int:
+        return self._versions.get(name, 0)
+
+    def open(self, database_url: str, check_interval: Optional[float] = None) -> bool:
+        """Start watching the database; returns False if it cannot be shared."""
+        if check_interval is not None:
+            self.check_interval = check_interval
+        database_path = sqlite_database_path(database_url)
+        if database_path is None:
+            logger.warning("Cache coherence needs a SQLite database file, not %s", database_url)
+            return False
+        try:
+            conn = sqlite3.connect(database_path, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout={get_settings().SQLITE_BUSY_TIMEOUT_MS}")
+            # One random epoch per database keeps ETags unique if the file is recreated
+            conn.execute(
+                "INSERT OR IGNORE INTO cache_versions (name, version) VALUES (?, ?)",
+                (EPOCH, secrets.randbits(31)),
+            )
+        except sqlite3.Error:
+            logger.exception("Cache coherence disabled: cannot use cache_versions in %s", database_path)
+            return False
+        self._conn = conn
+        self._data_version = self._read_data_version()
+        self._versions = self._read_versions()
+        return True
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._versions = {}
+        self._data_version = None
+
+    def _read_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _read_versions(self) -> Dict[str, int]:
+        return dict(self._conn.execute("SELECT name, version FROM cache_versions").fetchall())
+
+    def _notify(self, name: str, version: int, local: bool) -> None:
+        for handler in self._handlers.get(name, ()):
+            try:
+                handler(version, local)
+            except Exception:
+                logger.exception("Cache coherence handler for %r failed", name)
+
+    def check(self) -> None:
+        """Run handlers for namespaces another worker (or connection) has bumped."""
+        if self._conn is None:
+            return
+        if self.check_interval:
+            now = time.monotonic()
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+        self.checks += 1
+        try:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return
+            self._data_version = data_version
+            versions = self._read_versions()
+        except sqlite3.Error:
+            logger.exception("Cache coherence check failed")
+            return
+        self.refreshes += 1
+        for name, version in versions.items():
+            if self._versions.get(name) != version:
+                self._versions[name] = version
+                self.remote_changes += 1
+                self._notify(name, version, local=False)
+
+    async def publish(self, db: AsyncSession, *names: str) -> Dict[str, int]:
+        """Bump ``names`` inside the caller's transaction; returns the new versions."""
+        if self._conn is None:
+            return {}
+        versions = {}
+        for name in names:
+            stmt = sqlite_insert(CacheVersion).values(name=name, version=1)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CacheVersion.name],
+                set_={"version": CacheVersion.version + literal_column("1")},
+            ).returning(CacheVersion.version)
+            versions[name] = (await db.execute(stmt)).scalar_one()
+        return versions
+
+    def acknowledge(self, versions: Dict[str, int]) -> None:
+        """Record this worker's own committed bumps so they are not treated as remote.
+
+        Only a bump directly after the version already seen is taken; if
+        another worker committed in between, the next ``check`` handles both.
+        """
+        for name, version in versions.items():
+            if self._versions.get(name, 0) == version - 1:
+                self._versions[name] = version
+                self._notify(name, version, local=True)
+
+    async def commit(self, db: AsyncSession, *names: str) -> None:
+        """``db.commit()`` that also signals ``names`` to the other workers."""
+        versions = await self.publish(db, *names)
+        await db.commit()
+        self.acknowledge(versions)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "checks": self.checks,
+            "refreshes": self.refreshes,
+            "remote_changes": self.remote_changes,
+        }
+
+
+class CacheCoherenceMiddleware:
+    """Checks the shared versions before each HTTP request is handled."""
+
+    def __init__(self, app: ASGIApp, coherence: CacheCoherence):
+        self.app = app
+        self.coherence = coherence
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            self.coherence.check()
+        await self.app(scope, receive, send)
+
+
+# Opened, with CACHE_COHERENCE_CHECK_INTERVAL_MS, by the app lifespan
+cache_coherence = CacheCoherence()
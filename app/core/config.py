@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Attendance Management System"
@@ -12,17 +12,75 @@ class Settings(BaseSettings):
     AGE_ENCRYPTION_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
     BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 16
+    AGE_CACHE_SIZE: int = 10000
+    AGE_DECRYPT_CHUNK_SIZE: int = 256
     
     # Database
     DATABASE_URL: str = "sqlite:///./attendance.db"
+    DATABASE_READ_ENGINE: bool = False  # separate query_only engine for read endpoints
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64000  # negative = KiB, i.e. ~64 MB
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_FOREIGN_KEYS: bool = True
     
     # Network Security
     ALLOWED_HOSTS: List[str] = ["127.0.0.1", "localhost"]
     ALLOWED_ORIGINS: List[str] = ["http://127.0.0.1:8000", "http://localhost:8000"]
     
+    # Responses
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes; smaller bodies are sent as-is
+    FAST_LIST_RESPONSES: bool = False  # skip per-row Pydantic work on list endpoints
+
+    # Templates
+    TEMPLATE_CACHE_DIR: Optional[str] = None  # None = Jinja's per-user temp directory
+    TEMPLATE_AUTO_RELOAD: bool = True  # disable in production to skip mtime checks
+
+    # Pagination
+    ATTENDANCE_PAGE_SIZE: int = 100
+    ATTENDANCE_MAX_PAGE_SIZE: int = 1000
+    ATTENDANCE_EXPORT_BATCH_SIZE: int = 1000
+
+    # Student CSV import
+    STUDENT_IMPORT_BATCH_SIZE: int = 500
+
+    # In-memory attendance index (loaded at startup)
+    ATTENDANCE_INDEX_ENABLED: bool = True
+
+    # Instrumentation (Prometheus text format at /metrics)
+    METRICS_ENABLED: bool = True
+    # Clients (addresses or CIDR networks) that may scrape /metrics; others get a 404
+    METRICS_ALLOWED_IPS: List[str] = ["127.0.0.1", "::1"]
+    # Slow-query log with EXPLAIN QUERY PLAN capture and N+1 detection
+    SLOW_QUERY_LOG_ENABLED: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_SCAN_TABLES: List[str] = ["attendance", "sessions"]
+    N_PLUS_ONE_THRESHOLD: int = 10  # same statement more often than this per request; 0 disables
+
+    # Multi-worker serving (start.sh WORKERS=N turns coherence on)
+    CACHE_COHERENCE_ENABLED: bool = False  # sync per-worker caches through cache_versions
+    CACHE_COHERENCE_CHECK_INTERVAL_MS: float = 0  # 0 = check before every request
+    CACHE_COHERENCE_RELOAD_DELAY_SECONDS: float = 1.0  # debounce for attendance index reloads
+
+    # Reports
+    REPORT_PDF_WORKERS: int = 0  # 0 = one process per CPU core
+
     # Session Management
     MAX_DEVICES_PER_USER: int = 100
     SESSION_CLEANUP_MINUTES: int = 60 * 24  # 24 hours
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    LAST_SEEN_FLUSH_SECONDS: int = 30  # write-behind resolution for Session.last_seen
+    SESSION_PURGE_INTERVAL_SECONDS: int = 60 * 60  # 0 disables the background purge
+    SESSION_PURGE_BATCH_SIZE: int = 500  # primary-key window per delete transaction
+    SESSION_PURGE_PAUSE_SECONDS: float = 0.05  # max random pause between batches
     
     class Config:
         case_sensitive = True
@@ -1,18 +1,130 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import get_settings
+from .metrics import instrument_engine
+from .query_log import install_query_log, query_log
+
+
+def sqlite_pragmas(read_only: bool = False) -> dict:
+    """Connection pragmas applied to every new SQLite connection."""
+    settings = get_settings()
+    pragmas = {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+        "foreign_keys": "ON" if settings.SQLITE_FOREIGN_KEYS else "OFF",
+    }
+    if read_only:
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+
+def create_engine_from_settings(url: str, read_only: bool = False) -> AsyncEngine:
+    """Build an async engine with the SQLite performance profile applied.
+
+    Non-SQLite URLs are passed through with only the pool settings.
+    """
+    parsed = make_url(url)
+    is_sqlite = parsed.get_backend_name() == "sqlite"
+    in_memory = is_sqlite and parsed.database in (None, "", ":memory:")
+
+    kwargs = {"future": True}
+    if not in_memory:
+        settings = get_settings()
+        # aiosqlite defaults to NullPool; keep warm connections instead
+        kwargs.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    engine = create_async_engine(url, **kwargs)
+
+    if is_sqlite:
+        pragmas = sqlite_pragmas(read_only=read_only)
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
 
-settings = get_settings()
+    return engine
 
-# Use an async engine; DATABASE_URL must be an async URL (e.g. sqlite+aiosqlite:///... or postgresql+asyncpg://...)
-engine = create_async_engine(settings.DATABASE_URL, future=True)
 
-# Async session factory
-AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+# Session factories are bound to their engines by init_engines()
+AsyncSessionLocal = async_sessionmaker(expire_on_commit=False, class_=AsyncSession)
+ReadSessionLocal = async_sessionmaker(expire_on_commit=False, class_=AsyncSession)
+_engines: Dict[str, AsyncEngine] = {}
+
+
+def init_engines() -> AsyncEngine:
+    """Create the engines from settings on first use and bind the session factories.
+
+    DATABASE_URL must be an async URL (e.g. sqlite+aiosqlite:///... or
+    postgresql+asyncpg://...). With DATABASE_READ_ENGINE a separate
+    query_only engine serves the read endpoints; otherwise they share one.
+    """
+    if "write" in _engines:
+        return _engines["write"]
+    settings = get_settings()
+    engine = create_engine_from_settings(settings.DATABASE_URL)
+    read_engine = (
+        create_engine_from_settings(settings.DATABASE_URL, read_only=True)
+        if settings.DATABASE_READ_ENGINE
+        else engine
+    )
+    if settings.SLOW_QUERY_LOG_ENABLED:
+        query_log.configure(
+            threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+            n_plus_one_threshold=settings.N_PLUS_ONE_THRESHOLD,
+            explain=settings.SLOW_QUERY_EXPLAIN,
+            scan_tables=settings.SLOW_QUERY_SCAN_TABLES,
+        )
+    for _engine in {engine, read_engine}:
+        if settings.METRICS_ENABLED:
+            instrument_engine(_engine)
+        if settings.SLOW_QUERY_LOG_ENABLED:
+            install_query_log(_engine, query_log)
+    AsyncSessionLocal.configure(bind=engine)
+    ReadSessionLocal.configure(bind=read_engine)
+    _engines.update(write=engine, read=read_engine)
+    return engine
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections; the next init_engines() starts afresh."""
+    engines = set(_engines.values())
+    _engines.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
+def __getattr__(name: str):
+    # ``engine``/``read_engine`` are created lazily, on first access
+    if name in ("engine", "read_engine"):
+        init_engines()
+        return _engines["write" if name == "engine" else "read"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 Base = declarative_base()
 
 async def get_db():
     """Async DB session generator for dependency injection."""
+    init_engines()
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_read_db():
+    """Async DB session bound to the read-only engine (if enabled)."""
+    init_engines()
+    async with ReadSessionLocal() as session:
+        yield session
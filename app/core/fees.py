@@ -0,0 +1,170 @@
+"""Fees from the price history (``student_prices``).
+
+A student's price applies from its ``effective_from`` up to the day before
+their next price. ``fee_periods`` seeks each student's history to the price
+in effect at the start of the range, turns the prices up to its end into
+clipped intervals with ``LEAD()`` and range-joins attendance to them in one
+SQL statement, so each class is charged at the price in effect on its date.
+Per interval, whole months come from ``attendance_monthly`` and only the
+partial months at either end from ``attendance``, as index range scans on
+``(student_id, date)``. Cost grows with the number of intervals and months
+in the range, not with the length of the history or the number of classes.
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Date, String, and_, bindparam, case, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.attendance import Attendance, AttendanceMonthly
+from app.models.students import PRICE_HISTORY_START, Student, StudentPrice
+
+
+@dataclass
+class FeePeriod:
+    """Classes attended in ``[start, end]``, all charged at ``price``."""
+    start: date
+    end: date
+    price: Decimal
+    classes: int
+
+    @property
+    def fee(self) -> Decimal:
+        return self.classes * self.price
+
+
+def _price_intervals(filtered: bool):
+    """CTE of the price intervals overlapping ``[:start, :end]``, clipped to it."""
+    start_param = bindparam("start", type_=Date)
+    end_param = bindparam("end", type_=Date)
+
+    # Per student, seek to the price in effect on ``start`` and read forward
+    # to ``end``; older history is never touched. MATERIALIZED keeps SQLite
+    # from scanning all of student_prices to feed the window in order.
+    earlier = aliased(StudentPrice)
+    in_effect = (
+        select(func.max(earlier.effective_from))
+        .where(earlier.student_id == Student.id, earlier.effective_from <= start_param)
+        .scalar_subquery()
+    )
+    anchors = select(
+        Student.id.label("student_id"),
+        func.coalesce(in_effect, literal(PRICE_HISTORY_START, Date)).label("since"),
+    )
+    if filtered:
+        anchors = anchors.where(Student.id.in_(bindparam("student_ids", expanding=True)))
+    anchors = anchors.cte("anchors").prefix_with("MATERIALIZED")
+
+    history = (
+        select(
+            StudentPrice.student_id,
+            StudentPrice.effective_from,
+            StudentPrice.price,
+            func.lead(StudentPrice.effective_from).over(
+                partition_by=StudentPrice.student_id, order_by=StudentPrice.effective_from
+            ).label("next_from"),
+        )
+        .join_from(anchors, StudentPrice, and_(
+            StudentPrice.student_id == anchors.c.student_id,
+            StudentPrice.effective_from >= anchors.c.since,
+            StudentPrice.effective_from <= end_param,
+        ))
+        .subquery("history")
+    )
+
+    # Fetched as ISO strings for date.fromisoformat, which is far cheaper
+    # than the SQLite Date result processor on large reports
+    lo = func.max(history.c.effective_from, start_param, type_=String)
+    hi = func.coalesce(func.date(history.c.next_from, "-1 day"), end_param, type_=String)
+    clipped = select(history.c.student_id, history.c.price, lo.label("lo"), hi.label("hi")).subquery("clipped")
+
+    # Per interval: whole months from first_full up to after_last_full,
+    # raw days before and after them.
+    # Materialized so the date arithmetic runs once, not in every subquery.
+    first_full = case(
+        (func.strftime("%d", clipped.c.lo) == "01", clipped.c.lo),
+        else_=func.date(clipped.c.lo, "start of month", "+1 month"),
+    )
+    after_last_full = func.date(clipped.c.hi, "+1 day", "start of month")
+    return select(
+        clipped,
+        first_full.label("first_full"),
+        func.max(after_last_full, first_full).label("after_last_full"),
+    ).cte("intervals").prefix_with("MATERIALIZED")
+
+
+def _interval_classes(intervals):
+    """Classes in each interval: rollup months plus the raw edge days."""
+    # Correlated scalar subqueries: one index range seek each, no grouping
+    months = (
+        select(func.coalesce(func.sum(AttendanceMonthly.class_count), 0))
+        .where(
+            AttendanceMonthly.student_id == intervals.c.student_id,
+            AttendanceMonthly.year_month >= func.strftime("%Y-%m", intervals.c.first_full),
+            AttendanceMonthly.year_month < func.strftime("%Y-%m", intervals.c.after_last_full),
+        )
+        .scalar_subquery()
+    )
+    head = (
+        select(func.count())
+        .where(
+            Attendance.student_id == intervals.c.student_id,
+            Attendance.date >= intervals.c.lo,
+            Attendance.date < intervals.c.first_full,
+            Attendance.date <= intervals.c.hi,
+        )
+        .scalar_subquery()
+    )
+    tail = (
+        select(func.count())
+        .where(
+            Attendance.student_id == intervals.c.student_id,
+            Attendance.date >= intervals.c.after_last_full,
+            Attendance.date <= intervals.c.hi,
+        )
+        .scalar_subquery()
+    )
+    return months + head + tail
+
+
+def _fee_periods_statement(filtered: bool):
+    intervals = _price_intervals(filtered)
+    return (
+        select(
+            intervals.c.student_id,
+            intervals.c.price,
+            intervals.c.lo,
+            intervals.c.hi,
+            _interval_classes(intervals),
+        )
+        .order_by(intervals.c.student_id, intervals.c.lo)
+    )
+
+
+# Built once: constructing the statement costs more than running it for a few students
+_ALL_STUDENTS = _fee_periods_statement(filtered=False)
+_SELECTED_STUDENTS = _fee_periods_statement(filtered=True)
+
+
+async def fee_periods(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    student_ids: Optional[Iterable[int]] = None,
+) -> Dict[int, List[FeePeriod]]:
+    """Price periods per student within ``[start, end]``, in date order, with class counts."""
+    if student_ids is None:
+        result = await db.execute(_ALL_STUDENTS, {"start": start, "end": end})
+    else:
+        result = await db.execute(
+            _SELECTED_STUDENTS, {"start": start, "end": end, "student_ids": list(student_ids)}
+        )
+    periods: Dict[int, List[FeePeriod]] = {}
+    for student_id, price, lo, hi, classes in result:
+        periods.setdefault(student_id, []).append(
+            FeePeriod(date.fromisoformat(lo), date.fromisoformat(hi), Decimal(price), classes)
+        )
+    return periods
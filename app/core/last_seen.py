@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.sessions import Session
+
+logger = logging.getLogger(__name__)
+
+
+class LastSeenBuffer:
+    """Write-behind buffer for ``Session.last_seen``.
+
+    Authenticated requests only record the latest timestamp per session id in
+    memory; the buffer is written back with one batched UPDATE every
+    ``interval`` seconds and at shutdown instead of an UPDATE + commit per
+    request.
+    """
+
+    def __init__(self, interval: float = 0.0):
+        self.interval = interval
+        self._pending: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def touch(self, session_id: int, when: Optional[datetime] = None) -> None:
+        self._pending[session_id] = when or datetime.utcnow()
+
+    def clear(self) -> None:
+        self._pending.clear()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Write all pending timestamps in one statement and commit."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        table = Session.__table__
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("_session_id"))
+            .values(last_seen=bindparam("_last_seen"))
+        )
+        try:
+            await db.execute(
+                stmt,
+                [{"_session_id": sid, "_last_seen": ts} for sid, ts in pending.items()],
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            # Keep the values for the next attempt unless newer ones arrived
+            for sid, ts in pending.items():
+                self._pending.setdefault(sid, ts)
+            raise
+        return len(pending)
+
+    async def _run(self, session_factory: async_sessionmaker) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with session_factory() as db:
+                    await self.flush(db)
+            except Exception:
+                logger.exception("Failed to flush session last_seen updates")
+
+    def start(self, session_factory: async_sessionmaker, interval: Optional[float] = None) -> None:
+        if interval is not None:
+            self.interval = interval
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self, session_factory: async_sessionmaker) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        async with session_factory() as db:
+            await self.flush(db)
+
+
+# Started, with LAST_SEEN_FLUSH_SECONDS, by the app lifespan
+last_seen_buffer = LastSeenBuffer()
@@ -0,0 +1,262 @@
+"""Request and database instrumentation with Prometheus text exposition.
+
+``MetricsMiddleware`` times every HTTP request and labels it with the route
+template (``/api/v1/students/{student_id}``, not the raw path) once routing
+has happened. ``instrument_engine`` hooks SQLAlchemy cursor and commit events
+so each request also records how many statements it ran and how long they
+took. Recording is a few dict lookups and additions per event; the text
+format is only built when ``/metrics`` is scraped.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+OTHER_ROUTE = "<other>"
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts, then +Inf count, then sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in sorted(items):
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_join_labels(base, _le(bound))} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            yield f"{self.name}_bucket{_join_labels(base, _le('+Inf'))} {cumulative}"
+            yield f"{self.name}_sum{_wrap(base)} {series[-1]}"
+            yield f"{self.name}_count{_wrap(base)} {cumulative}"
+
+
+class Counter:
+    """Monotonic counter keyed by a label tuple (``()`` when unlabelled)."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[tuple, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] += amount
+
+    def value(self, labels: tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_wrap(_format_labels(self.label_names, labels))} {value}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _le(bound) -> str:
+    return f'le="{bound}"'
+
+
+def _join_labels(base: str, extra: str) -> str:
+    return "{" + (f"{base},{extra}" if base else extra) + "}"
+
+
+def _wrap(base: str) -> str:
+    return "{" + base + "}" if base else ""
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+    commits: int = 0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+class Metrics:
+    """Process-wide metric families and the gauge callbacks read at scrape time."""
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "Request latency by route template.",
+            ("method", "route"), LATENCY_BUCKETS,
+        )
+        self.requests = Counter(
+            "http_requests_total", "Requests by route template and status code.",
+            ("method", "route", "status"),
+        )
+        self.request_statements = Histogram(
+            "http_request_db_statements", "SQL statements executed per request.",
+            ("method", "route"), STATEMENT_BUCKETS,
+        )
+        self.request_db_seconds = Histogram(
+            "http_request_db_seconds", "Time spent in SQL per request.",
+            ("method", "route"), LATENCY_BUCKETS,
+        )
+        self.request_commits = Counter(
+            "http_request_db_commits_total", "Commits issued while serving each route.",
+            ("method", "route"),
+        )
+        self.db_statements = Counter("db_statements_total", "SQL statements executed.")
+        self.db_seconds = Counter("db_statement_seconds_total", "Time spent executing SQL.")
+        self.db_commits = Counter("db_commits_total", "Transactions committed.")
+        self.in_flight = 0
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict[str, float]]]] = {}
+
+    def register_gauges(self, prefix: str, help_text: str, collect: Callable[[], Dict[str, float]]) -> None:
+        """Expose the numeric values of ``collect()`` as ``<prefix>_<key>`` gauges."""
+        self._gauges[prefix] = (help_text, collect)
+
+    def reset(self) -> None:
+        for family in self._families():
+            family.clear()
+
+    def _families(self):
+        return (
+            self.request_seconds, self.requests, self.request_statements,
+            self.request_db_seconds, self.request_commits,
+            self.db_statements, self.db_seconds, self.db_commits,
+        )
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        for family in self._families():
+            lines.extend(family.render())
+        for prefix, (help_text, collect) in self._gauges.items():
+            for key, value in collect().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# HELP {prefix}_{key} {help_text}")
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Count statements, SQL time and commits on ``engine``."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        # On the per-statement context: a statement that raises never reaches
+        # _after, and its start time goes away with the context
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        metrics.db_statements.inc()
+        metrics.db_seconds.inc(amount=elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(sync_engine, "commit")
+    def _commit(conn):
+        metrics.db_commits.inc()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.commits += 1
+
+
+class MetricsMiddleware:
+    """Per-route latency, status, SQL and in-flight accounting for HTTP requests."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+        metrics.in_flight += 1
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            _request_stats.reset(token)
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", OTHER_ROUTE))
+            metrics.request_seconds.observe(labels, elapsed)
+            metrics.requests.inc(labels + (str(status_code),))
+            metrics.request_statements.observe(labels, stats.statements)
+            metrics.request_db_seconds.observe(labels, stats.db_seconds)
+            if stats.commits:
+                metrics.request_commits.inc(labels, stats.commits)
@@ -0,0 +1,156 @@
+"""Minimal dependency-free PDF rendering for attendance reports.
+
+Only the standard Helvetica fonts are used, so nothing has to be embedded and
+a report renders in well under a millisecond. Everything in this module is
+plain data in, bytes out, so it can run inside a process pool worker.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
+
+PAGE_WIDTH = 595  # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 56
+LINE_HEIGHT = 16
+
+# (x, y, font size, bold, text)
+TextOp = Tuple[float, float, int, bool, str]
+
+
+def _escape(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _content_stream(ops: Sequence[TextOp], rules: Sequence[float]) -> bytes:
+    parts = []
+    for x, y, size, bold, text in ops:
+        font = b"/F2" if bold else b"/F1"
+        parts.append(
+            b"BT %s %d Tf %.2f %.2f Td (%s) Tj ET" % (font, size, x, y, _escape(text))
+        )
+    for y in rules:
+        parts.append(b"0.5 w %d %.2f m %d %.2f l S" % (MARGIN, y, PAGE_WIDTH - MARGIN, y))
+    return b"\n".join(parts)
+
+
+def build_pdf(pages: Sequence[Tuple[Sequence[TextOp], Sequence[float]]]) -> bytes:
+    """Assemble a PDF from per-page text operations and horizontal rules."""
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold "
+        b"/Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for ops, rules in pages:
+        stream = _content_stream(ops, rules)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, content_ref)
+        )
+        page_refs.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % ref for ref in page_refs),
+        len(page_refs),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+def render_student_report(
+    name: str,
+    level: str,
+    periods: Sequence[Tuple[date, date, Decimal, int]],
+    start_date: date,
+    end_date: date,
+    dates: Sequence[date],
+) -> bytes:
+    """Render the individual student report (summary plus attendance dates).
+
+    ``periods`` are ``(start, end, price, classes)`` for each price in effect
+    during the report range.
+    """
+    total = sum((price * classes for _, _, price, classes in periods), Decimal("0.00"))
+    y = PAGE_HEIGHT - MARGIN
+    ops: List[TextOp] = [
+        (MARGIN, y, 18, True, "Individual Student Report"),
+        (MARGIN, y - 22, 12, False, f"{name} ({level})"),
+        (
+            MARGIN,
+            y - 40,
+            10,
+            False,
+            f"Period: {start_date:%d/%m/%Y} - {end_date:%d/%m/%Y}",
+        ),
+        (MARGIN, y - 64, 11, False, f"Classes Attended: {len(dates)}"),
+    ]
+    y -= 80
+    if len(periods) == 1:
+        ops.append((MARGIN, y, 11, False, f"Price per Class: £{periods[0][2]:.2f}"))
+        y -= LINE_HEIGHT
+    elif periods:
+        ops.append((MARGIN, y, 11, False, "Price per Class:"))
+        y -= LINE_HEIGHT
+        for start, end, price, classes in periods:
+            ops.append((
+                MARGIN + 12, y, 10, False,
+                f"£{price:.2f} from {start:%d/%m/%Y} to {end:%d/%m/%Y}: {classes} classes",
+            ))
+            y -= LINE_HEIGHT
+    ops.append((MARGIN, y, 11, True, f"Total Fees: £{total:.2f}"))
+    y -= 28
+    ops.append((MARGIN, y, 11, True, "Date"))
+    rules = [y - 6]
+    pages = []
+    y -= LINE_HEIGHT
+    for day in dates:
+        if y < MARGIN:
+            pages.append((ops, rules))
+            ops, rules = [], []
+            y = PAGE_HEIGHT - MARGIN
+        ops.append((MARGIN, y, 10, False, f"{day:%d/%m/%Y}"))
+        y -= LINE_HEIGHT
+    pages.append((ops, rules))
+    return build_pdf(pages)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def report_worker_count(max_workers: int = 0) -> int:
+    return max_workers or os.cpu_count() or 1
+
+
+def get_report_executor(max_workers: int = 0) -> ProcessPoolExecutor:
+    """Return the shared process pool used to render report PDFs."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=report_worker_count(max_workers))
+    return _executor
+
+
+def shutdown_report_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,214 @@
+"""Slow-query log and N+1 detector.
+
+``install_query_log`` hooks the engine's cursor events. Any statement slower
+than ``SLOW_QUERY_THRESHOLD_MS`` is logged with the shape of its parameters
+(types only, never values), the route that issued it and, on SQLite, its
+``EXPLAIN QUERY PLAN``; plans that scan one of ``SLOW_QUERY_SCAN_TABLES``
+without an index are flagged. ``QueryLogMiddleware`` tallies normalized
+statements per request and reports requests that repeat one statement more
+than ``N_PLUS_ONE_THRESHOLD`` times.
+"""
+import contextvars
+import logging
+import re
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def normalize_statement(statement: str) -> str:
+    """Collapse whitespace and expanded ``IN (?, ?, ...)`` lists."""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(?...)", statement)
+
+
+def parameters_shape(parameters, executemany: bool) -> str:
+    """Describe bound parameters by type only, so values never reach the log."""
+    if executemany:
+        rows = list(parameters or ())
+        return f"executemany[{len(rows)}] x {parameters_shape(rows[0], False) if rows else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in parameters or ()) + ")"
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    duration_ms: float
+    parameters: str
+    route: str
+    plan: List[str] = field(default_factory=list)
+    full_scans: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _RequestQueries:
+    scope: Scope
+    statements: Counter = field(default_factory=Counter)
+
+
+_current_request: contextvars.ContextVar[Optional[_RequestQueries]] = contextvars.ContextVar(
+    "query_log_request", default=None
+)
+
+
+def _route(request: Optional[_RequestQueries]) -> str:
+    if request is None:
+        return "<no request>"
+    route = request.scope.get("route")
+    return f"{request.scope.get('method')} {getattr(route, 'path', request.scope.get('path'))}"
+
+
+class QueryLog:
+    """Collects slow statements and N+1 suspects; keeps the latest in memory."""
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        n_plus_one_threshold: int,
+        explain: bool = True,
+        scan_tables: Sequence[str] = ("attendance", "sessions"),
+        keep: int = 100,
+    ):
+        self.configure(threshold_ms, n_plus_one_threshold, explain, scan_tables)
+        self.slow_queries: Deque[SlowQuery] = deque(maxlen=keep)
+        self.n_plus_one: Deque[dict] = deque(maxlen=keep)
+        self.slow_total = 0
+        self.full_scan_total = 0
+        self.n_plus_one_total = 0
+
+    def configure(
+        self,
+        threshold_ms: float,
+        n_plus_one_threshold: int,
+        explain: bool = True,
+        scan_tables: Sequence[str] = ("attendance", "sessions"),
+    ) -> None:
+        self.threshold_ms = threshold_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.explain = explain
+        self.scan_tables = tuple(scan_tables)
+        self._scan_pattern = (
+            re.compile(r"\bSCAN (?:TABLE )?(" + "|".join(map(re.escape, self.scan_tables)) + r")\b(?! USING)")
+            if self.scan_tables else None
+        )
+
+    def clear(self) -> None:
+        self.slow_queries.clear()
+        self.n_plus_one.clear()
+
+    def stats(self) -> dict:
+        return {
+            "slow_total": self.slow_total,
+            "full_scan_total": self.full_scan_total,
+            "n_plus_one_total": self.n_plus_one_total,
+        }
+
+    def _explain(self, conn, statement: str, parameters) -> List[str]:
+        # A raw DBAPI cursor keeps EXPLAIN out of the engine's own events
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [row[-1] for row in cursor.fetchall()]
+        except Exception as exc:  # best effort; never fail the real query
+            return [f"<explain failed: {exc}>"]
+        finally:
+            cursor.close()
+
+    def record(self, conn, statement: str, parameters, executemany: bool, elapsed: float) -> None:
+        request = _current_request.get()
+        if request is not None and self.n_plus_one_threshold:
+            request.statements[normalize_statement(statement)] += 1
+
+        duration_ms = elapsed * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        entry = SlowQuery(
+            statement=normalize_statement(statement),
+            duration_ms=round(duration_ms, 3),
+            parameters=parameters_shape(parameters, executemany),
+            route=_route(request),
+        )
+        if (
+            self.explain
+            and not executemany
+            and conn.dialect.name == "sqlite"
+            and entry.statement.upper().startswith(_EXPLAINABLE)
+        ):
+            entry.plan = self._explain(conn, statement, parameters)
+            if self._scan_pattern is not None:
+                entry.full_scans = [line for line in entry.plan if self._scan_pattern.search(line)]
+
+        self.slow_total += 1
+        self.full_scan_total += bool(entry.full_scans)
+        self.slow_queries.append(entry)
+        logger.warning(
+            "Slow query %.1fms on %s%s: %s params=%s plan=%s",
+            entry.duration_ms,
+            entry.route,
+            " [FULL SCAN]" if entry.full_scans else "",
+            entry.statement,
+            entry.parameters,
+            " | ".join(entry.plan),
+        )
+
+    def finish_request(self, request: _RequestQueries) -> None:
+        if not self.n_plus_one_threshold:
+            return
+        for statement, count in request.statements.items():
+            if count > self.n_plus_one_threshold:
+                self.n_plus_one_total += 1
+                suspect = {"route": _route(request), "statement": statement, "count": count}
+                self.n_plus_one.append(suspect)
+                logger.warning("Possible N+1 on %s: %d x %s", suspect["route"], count, statement)
+
+
+def install_query_log(engine: AsyncEngine, query_log: QueryLog) -> None:
+    """Time every statement on ``engine`` and hand it to ``query_log``."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        # Per statement: one that raises never reaches _after
+        context._query_log_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_log_start
+        query_log.record(conn, statement, parameters, executemany, elapsed)
+
+
+class QueryLogMiddleware:
+    """Per-request statement tally used by the N+1 detector."""
+
+    def __init__(self, app: ASGIApp, query_log: QueryLog):
+        self.app = app
+        self.query_log = query_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = _RequestQueries(scope=scope)
+        token = _current_request.set(request)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+            self.query_log.finish_request(request)
+
+
+# Records nothing until init_engines() applies the SLOW_QUERY_* settings
+query_log = QueryLog(threshold_ms=float("inf"), n_plus_one_threshold=0)
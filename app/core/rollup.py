@@ -0,0 +1,77 @@
+"""Monthly attendance rollup (``attendance_monthly``).
+
+Writers call ``apply_attendance_changes`` in the same transaction as the
+``attendance`` insert/delete, so the rollup never drifts from the raw rows.
+``fees.fee_periods`` reads whole months from the rollup and scans raw rows
+only for the partial months at either end, so report cost grows with the
+number of months rather than the number of classes.
+"""
+from collections import Counter
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.attendance import Attendance, AttendanceMonthly
+
+
+def month_key(day: date) -> str:
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+async def apply_attendance_changes(db: AsyncSession, changes: Iterable[Tuple[int, date, int]]) -> None:
+    """Add ``(student_id, date, delta)`` changes to the rollup.
+
+    Does not commit; the caller commits together with the raw rows.
+    """
+    deltas = Counter()
+    for student_id, day, delta in changes:
+        deltas[(student_id, month_key(day))] += delta
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    stmt = sqlite_insert(AttendanceMonthly).values([
+        {"student_id": student_id, "year_month": year_month, "class_count": delta}
+        for (student_id, year_month), delta in deltas.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["student_id", "year_month"],
+        set_={"class_count": AttendanceMonthly.class_count + stmt.excluded.class_count},
+    )
+    await db.execute(stmt)
+
+    emptied = [key for key, delta in deltas.items() if delta < 0]
+    if emptied:
+        await db.execute(
+            delete(AttendanceMonthly).where(
+                tuple_(AttendanceMonthly.student_id, AttendanceMonthly.year_month).in_(emptied),
+                AttendanceMonthly.class_count <= 0,
+            )
+        )
+
+
+async def rebuild_attendance_monthly(db: AsyncSession, student_id: Optional[int] = None) -> int:
+    """Recompute the rollup from ``attendance``; returns the number of rollup rows.
+
+    Does not commit.
+    """
+    clear = delete(AttendanceMonthly)
+    source = select(
+        Attendance.student_id,
+        func.strftime("%Y-%m", Attendance.date),
+        func.count(),
+    ).group_by(Attendance.student_id, func.strftime("%Y-%m", Attendance.date))
+    if student_id is not None:
+        clear = clear.where(AttendanceMonthly.student_id == student_id)
+        source = source.where(Attendance.student_id == student_id)
+
+    await db.execute(clear)
+    result = await db.execute(
+        insert(AttendanceMonthly).from_select(
+            ["student_id", "year_month", "class_count"], source
+        )
+    )
+    return result.rowcount
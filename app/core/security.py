@@ -1,34 +1,205 @@
-from cryptography.fernet import Fernet
-from typing import Optional
+import asyncio
+import base64
+import hashlib
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
 from datetime import datetime, timedelta
-import bcrypt
-import jwt
+from .cache import TTLCache
 from .config import get_settings
 
-settings = get_settings()
+# Age encryption; cryptography, bcrypt and PyJWT are imported on first use
+fernet = None
 
-# Age encryption
-fernet = Fernet(settings.AGE_ENCRYPTION_KEY.encode())
+# Decrypted ages keyed by ciphertext; Fernet tokens are unique per encryption.
+# Sized by init_crypto(), which runs before anything is cached.
+age_cache = TTLCache(maxsize=0)
+_age_pool: Optional[ThreadPoolExecutor] = None
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hash/verify jobs are already queued."""
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop with admission control.
+
+    ``bcrypt`` releases the GIL while hashing, so a small thread pool uses
+    several cores. At most ``workers`` jobs run at once and ``max_queue``
+    more may wait; anything beyond that is rejected with
+    ``PasswordHasherBusy`` instead of piling up behind the pool.
+    """
+
+    def __init__(self, workers: int = 1, max_queue: int = 0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._admitted = 0
+
+    def configure(self, workers: int, max_queue: int) -> None:
+        """Resize the pool; running jobs finish on the old one."""
+        self.shutdown()
+        self.workers = workers
+        self.max_queue = max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._admitted
+
+    async def run(self, func, *args):
+        if self._admitted >= self.workers + self.max_queue:
+            raise PasswordHasherBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._admitted += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._admitted -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Sized by init_crypto()
+password_hasher = PasswordHasher()
+
+def init_crypto():
+    """Build the age cipher, failing fast on a malformed AGE_ENCRYPTION_KEY.
+
+    Also sizes the age cache and the bcrypt pool from settings.
+    """
+    global fernet
+    if fernet is None:
+        from cryptography.fernet import Fernet
+
+        settings = get_settings()
+        age_cache.maxsize = settings.AGE_CACHE_SIZE
+        password_hasher.configure(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+        fernet = Fernet(settings.AGE_ENCRYPTION_KEY.encode())
+    return fernet
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    import bcrypt
+
     return bcrypt.checkpw(
         plain_password.encode('utf-8')[:72],
         hashed_password.encode('utf-8')
     )
 
 def get_password_hash(password: str) -> str:
+    import bcrypt
+
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    salt = bcrypt.gensalt(rounds=get_settings().BCRYPT_ROUNDS)
     return bcrypt.hashpw(password_bytes, salt).decode('utf-8')
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    init_crypto()
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    init_crypto()
+    return await password_hasher.run(get_password_hash, password)
+
 def encrypt_age(age: int) -> bytes:
-    return fernet.encrypt(str(age).encode())
+    return (fernet or init_crypto()).encrypt(str(age).encode())
+
+def _age_pool_map(fn, items: Sequence) -> List:
+    """Apply ``fn`` to ``items`` in ``AGE_DECRYPT_CHUNK_SIZE`` chunks on the age pool."""
+    global _age_pool
+    chunk = get_settings().AGE_DECRYPT_CHUNK_SIZE
+    if len(items) <= chunk:
+        return [fn(item) for item in items]
+    if _age_pool is None:
+        _age_pool = ThreadPoolExecutor(thread_name_prefix="age-crypto")
+    chunks = [items[i:i + chunk] for i in range(0, len(items), chunk)]
+    return [result for part in _age_pool.map(lambda cs: [fn(c) for c in cs], chunks) for result in part]
+
+def encrypt_ages(ages: Sequence[int]) -> List[bytes]:
+    """Encrypt a batch of ages, seeding the age cache with the results."""
+    ciphertexts = _age_pool_map(encrypt_age, list(ages))
+    for ciphertext, age in zip(ciphertexts, ages):
+        age_cache.set(ciphertext, age)
+    return ciphertexts
+
+def _decrypt_age(encrypted_age: bytes) -> int:
+    return int((fernet or init_crypto()).decrypt(encrypted_age).decode())
 
 def decrypt_age(encrypted_age: bytes) -> int:
-    return int(fernet.decrypt(encrypted_age).decode())
+    age = age_cache.get(encrypted_age)
+    if age is None:
+        age = _decrypt_age(encrypted_age)
+        age_cache.set(encrypted_age, age)
+    return age
+
+def decrypt_ages(encrypted_ages: Sequence[bytes]) -> List[int]:
+    """Decrypt a whole result set of ages at once.
+
+    Cached values are reused; the remaining ciphertexts are decrypted in
+    chunks of ``AGE_DECRYPT_CHUNK_SIZE`` spread over a thread pool when there
+    is more than one chunk.
+    """
+    ages = [age_cache.get(c) for c in encrypted_ages]
+    missing = list({c for c, age in zip(encrypted_ages, ages) if age is None})
+    if not missing:
+        return ages
+
+    decrypted = _age_pool_map(_decrypt_age, missing)
+    resolved = dict(zip(missing, decrypted))
+    for c, age in resolved.items():
+        age_cache.set(c, age)
+    return [resolved[c] if age is None else age for c, age in zip(encrypted_ages, ages)]
+
+def new_session_id() -> str:
+    """Random ``jti`` claim identifying a login session (16 bytes, base64url)."""
+    return secrets.token_urlsafe(16)
+
+def session_key(token: str, jti: Optional[str] = None) -> bytes:
+    """16-byte database key of the session behind ``token``.
+
+    Tokens carry their key in the ``jti`` claim; tokens issued before that
+    claim existed are keyed by a truncated SHA-256 of the whole token.
+    """
+    if jti:
+        try:
+            raw = base64.urlsafe_b64decode(jti + "=" * (-len(jti) % 4))
+        except ValueError:
+            raw = b""
+        if len(raw) == 16:
+            return raw
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+def decode_access_token(token: str, verify_exp: bool = True) -> Optional[dict]:
+    """Claims of a token signed with SECRET_KEY, or None if it is invalid."""
+    import jwt
+
+    try:
+        return jwt.decode(
+            token, get_settings().SECRET_KEY, algorithms=["HS256"], options={"verify_exp": verify_exp}
+        )
+    except jwt.PyJWTError:
+        return None
+
+def token_session_key(token: str) -> Optional[bytes]:
+    """Session key of a signed token, ignoring expiry (used at logout)."""
+    payload = decode_access_token(token, verify_exp=False)
+    if payload is None:
+        return None
+    return session_key(token, payload.get("jti"))
+
+def create_access_token(
+    data: dict,
+    expires_delta: Optional[timedelta] = None,
+    jti: Optional[str] = None,
+) -> str:
+    import jwt
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    settings = get_settings()
     to_encode = data.copy()
+    if jti:
+        to_encode["jti"] = jti
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -0,0 +1,45 @@
+"""Fast JSON encoding for large list responses.
+
+The list endpoints can bypass per-row Pydantic validation and serialize plain
+row dicts straight to bytes with ``orjson`` (a required dependency; the
+speedup depends on it). Without it the stdlib encoder produces the same
+output, much more slowly.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Mapping
+
+from fastapi import Response
+
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    # Match Pydantic's JSON mode: Decimal as string, dates in ISO 8601
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(rows: Iterable[Mapping[str, Any]]) -> bytes:
+    """Encode a list of row mappings as a JSON array."""
+    if orjson is not None:
+        return orjson.dumps(list(rows), default=_default)
+    return json.dumps(list(rows), default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    """JSON response whose content is already-encoded bytes or plain rows."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
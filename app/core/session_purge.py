@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import principal_cache
+from app.core.coherence import SESSIONS, cache_coherence
+from app.core.config import get_settings
+from app.core.last_seen import last_seen_buffer
+from app.models.sessions import Session
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPurger:
+    """Deletes expired and idle rows from ``sessions``.
+
+    A session is expired once its token has outlived
+    ``ACCESS_TOKEN_EXPIRE_MINUTES`` and idle once it has not been seen for
+    ``SESSION_CLEANUP_MINUTES``. Rows are deleted in ``batch_size`` windows
+    of the primary key, one short transaction each, with a random pause
+    between windows so the purge never holds the write lock for long. The
+    background loop also jitters its interval so several workers do not
+    purge in lockstep.
+    """
+
+    def __init__(self, interval: float, batch_size: int, pause: float):
+        self.configure(interval, batch_size, pause)
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.errors = 0
+        self.deleted_total = 0
+        self.last_deleted = 0
+        self.last_batches = 0
+        self.last_duration_seconds = 0.0
+        self.last_run_at: Optional[datetime] = None
+
+    def configure(self, interval: float, batch_size: int, pause: float) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def _stale(self, now: datetime):
+        settings = get_settings()
+        expired_before = now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        idle_before = now - timedelta(minutes=settings.SESSION_CLEANUP_MINUTES)
+        return or_(Session.created_at < expired_before, Session.last_seen < idle_before)
+
+    async def purge(self, db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """Delete stale sessions batch by batch; returns the number removed."""
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        # Pending last_seen values could make an active session look idle
+        await last_seen_buffer.flush(db)
+
+        low, high = (await db.execute(select(func.min(Session.id), func.max(Session.id)))).one()
+        deleted = batches = 0
+        if low is not None:
+            stale = self._stale(now)
+            for start in range(low, high + 1, self.batch_size):
+                result = await db.execute(
+                    delete(Session)
+                    .where(Session.id >= start, Session.id < start + self.batch_size, stale)
+                    .returning(Session.id)
+                )
+                session_ids = result.scalars().all()
+                if session_ids:
+                    await cache_coherence.commit(db, SESSIONS)
+                else:
+                    await db.commit()
+                batches += 1
+                deleted += len(session_ids)
+                for session_id in session_ids:
+                    principal_cache.invalidate_session(session_id)
+                if self.pause:
+                    await asyncio.sleep(random.uniform(0, self.pause))
+
+        self.runs += 1
+        self.deleted_total += deleted
+        self.last_deleted = deleted
+        self.last_batches = batches
+        self.last_duration_seconds = time.perf_counter() - started
+        self.last_run_at = now
+        logger.info("Purged %d stale sessions in %d batches (%.3fs)", deleted, batches, self.last_duration_seconds)
+        return deleted
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "deleted_total": self.deleted_total,
+            "last_deleted": self.last_deleted,
+            "last_batches": self.last_batches,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+    async def _run(self, session_factory: async_sessionmaker) -> None:
+        while True:
+            await asyncio.sleep(self.interval * random.uniform(0.9, 1.1))
+            try:
+                async with session_factory() as db:
+                    await self.purge(db)
+            except Exception:
+                self.errors += 1
+                logger.exception("Failed to purge stale sessions")
+
+    def start(self, session_factory: async_sessionmaker) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Configured from the SESSION_PURGE_* settings and started by the app lifespan
+session_purger = SessionPurger(interval=0, batch_size=1, pause=0)
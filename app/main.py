@@ -1,213 +1,210 @@
-# Minimal main.py for initial testing
-from fastapi import FastAPI, Depends, HTTPException, Request, Response, Form
-from fastapi.responses import RedirectResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from pathlib import Path
-from starlette.middleware.cors import CORSMiddleware
-
-from app.core.config import get_settings
-from app.core.database import engine, Base, get_db
-from app.api.dependencies import get_optional_current_user
-from typing import Optional
-from app.models.users import User
-from sqlalchemy import select
-from app.core.security import verify_password, create_access_token
-
-settings = get_settings()
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version=settings.VERSION
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Static files and templates
-app.mount(
-    "/static",
-    StaticFiles(directory=Path(__file__).parent / "static"),
-    name="static"
-)
-templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
-
-@app.get("/")
-async def root(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    """Render the homepage."""
-    return templates.TemplateResponse(
-        "base.html",
-        {"request": request, "title": settings.PROJECT_NAME, "user": user, "messages": []}
+"""Application factory.
+
+Importing this module is cheap: it reads no settings and imports neither the
+routers, the crypto libraries, Jinja2 nor SQLAlchemy. ``create_app()`` wires
+everything up and the lifespan creates the engines and the cipher, so a
+missing or broken ``.env`` is reported when the server starts rather than when
+something merely imports ``app.main``. ``app`` is built on first access, which
+keeps ``uvicorn app.main:app`` and ``from app.main import app`` working;
+``uvicorn --factory app.main:create_app`` skips the module attribute entirely.
+"""
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create engines and the cipher, warm templates and indexes, run background writers."""
+    from app.core.attendance_index import attendance_index
+    from app.core.cache import roster_version
+    from app.core.coherence import EPOCH, ROSTER, cache_coherence
+    from app.core.config import get_settings
+    from app.core.database import AsyncSessionLocal, dispose_engines, init_engines
+    from app.core.last_seen import last_seen_buffer
+    from app.core.pdf import shutdown_report_executor
+    from app.core.security import init_crypto, password_hasher
+    from app.core.session_purge import session_purger
+    from app.pages import asset_manifest, precompile_templates
+
+    settings = get_settings()
+    init_engines()
+    init_crypto()
+    asset_manifest.build()
+    precompile_templates()
+    coherence_interval = settings.CACHE_COHERENCE_CHECK_INTERVAL_MS / 1000
+    if settings.CACHE_COHERENCE_ENABLED and cache_coherence.open(settings.DATABASE_URL, coherence_interval):
+        roster_version.sync(cache_coherence.version(ROSTER), epoch=f"{cache_coherence.version(EPOCH):x}")
+    if settings.ATTENDANCE_INDEX_ENABLED:
+        await attendance_index.load_from(AsyncSessionLocal)
+    last_seen_buffer.start(AsyncSessionLocal, settings.LAST_SEEN_FLUSH_SECONDS)
+    session_purger.configure(
+        interval=settings.SESSION_PURGE_INTERVAL_SECONDS,
+        batch_size=settings.SESSION_PURGE_BATCH_SIZE,
+        pause=settings.SESSION_PURGE_PAUSE_SECONDS,
     )
+    session_purger.start(AsyncSessionLocal)
+    yield
+    await session_purger.stop()
+    await attendance_index.stop()
+    await last_seen_buffer.stop(AsyncSessionLocal)
+    cache_coherence.close()
+    shutdown_report_executor()
+    password_hasher.shutdown()
+    await dispose_engines()
 
 
-@app.get("/students")
-async def students_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    """Render the students list page (frontend)."""
-    return templates.TemplateResponse(
-        "students/list.html",
-        {"request": request, "title": "Students", "user": user, "messages": []}
-    )
+def _sync_roster_version(version: int, local: bool) -> None:
+    from app.core.cache import roster_version
 
+    roster_version.sync(version)
 
-@app.get("/students/create")
-async def create_student_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    """Render the create student page."""
-    return templates.TemplateResponse(
-        "students/create.html",
-        {"request": request, "title": "Add Student", "user": user, "messages": []}
-    )
 
+def _drop_principals(version: int, local: bool) -> None:
+    from app.core.cache import principal_cache
 
-@app.get("/students/{student_id}")
-async def view_student_page(student_id: int, request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    """Render the view student page."""
-    return templates.TemplateResponse(
-        "students/view.html",
-        {"request": request, "title": "Student Details", "user": user, "messages": []}
-    )
+    # Own logouts/revocations already invalidated exactly what they removed
+    if not local:
+        principal_cache.clear()
 
 
-@app.get("/students/{student_id}/edit", name="edit_student")
-async def edit_student_page(student_id: int, request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    """Render the edit student page."""
-    return templates.TemplateResponse(
-        "students/edit.html",
-        {"request": request, "title": "Edit Student", "user": user, "messages": []}
-    )
+def _reload_attendance_index(version: int, local: bool) -> None:
+    from app.core.attendance_index import attendance_index
+    from app.core.config import get_settings
+    from app.core.database import AsyncSessionLocal
 
+    # Own writes update the index directly after commit
+    settings = get_settings()
+    if not local and settings.ATTENDANCE_INDEX_ENABLED:
+        attendance_index.reload_soon(AsyncSessionLocal, settings.CACHE_COHERENCE_RELOAD_DELAY_SECONDS)
 
 
-# GET: Render login page
-@app.get("/auth/login")
-async def login_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    return templates.TemplateResponse(
-        "auth/login.html",
-        {"request": request, "title": "Login", "user": user, "messages": []}
-    )
+async def metrics_endpoint(request: Request):
+    """Prometheus text exposition of request, SQL and cache metrics.
 
-# POST: Handle login form, set cookie, redirect
-@app.post("/auth/login")
-async def login_form(
-    request: Request,
-    response: Response,
-    username: str = Form(...),
-    password: str = Form(...),
-    db=Depends(get_db)
-):
-    from app.models.sessions import Session
-    
-    stmt = select(User).where(User.username == username)
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
-    if not user or not verify_password(password, user.password_hash):
-        # Show error on login page
-        return templates.TemplateResponse(
-            "auth/login.html",
-            {"request": request, "title": "Login", "user": None, "messages": [{"type": "danger", "text": "Invalid credentials"}]},
-            status_code=401
-        )
-    
-    # Create access token
-    access_token = create_access_token(data={"sub": user.username})
-    
-    # Create session record in database
-    session = Session(
-        user_id=user.id,
-        device_name=request.headers.get("User-Agent", "Unknown Device"),
-        session_token=access_token,
-        ip_address=request.client.host if request.client else "unknown",
-        user_agent=request.headers.get("User-Agent")
-    )
-    db.add(session)
-    await db.commit()
-    
-    # Redirect and set cookie
-    redirect = RedirectResponse(url="/students", status_code=303)
-    redirect.set_cookie(
-        key="session",
-        value=access_token,
-        httponly=True,
-        samesite="lax",
-        max_age=get_settings().ACCESS_TOKEN_EXPIRE_MINUTES * 60
-    )
-    return redirect
-
-
-@app.post("/auth/logout")
-async def logout_form(
-    request: Request,
-    response: Response,
-    db=Depends(get_db)
-):
-    """Handle logout from browser form, delete session cookie and redirect."""
-    from app.models.sessions import Session
-    session_token = request.cookies.get("session")
-    if session_token:
-        await db.execute(
-            Session.__table__.delete().where(Session.session_token == session_token)
-        )
-        await db.commit()
-    
-    redirect = RedirectResponse(url="/auth/login", status_code=303)
-    redirect.delete_cookie(key="session")
-    return redirect
-
-
-@app.get("/attendance")
-async def attendance_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    """Render the attendance list page."""
-    return templates.TemplateResponse(
-        "attendance/list.html",
-        {"request": request, "title": "Attendance", "user": user, "messages": []}
-    )
+    Only clients in ``METRICS_ALLOWED_IPS`` may scrape it: the output lists
+    every route with its traffic and the cache and session purge statistics.
+    """
+    from ipaddress import ip_address
 
+    from fastapi import HTTPException, status
+    from fastapi.responses import PlainTextResponse
 
-@app.get("/attendance/mark")
-async def mark_attendance_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    """Render the mark attendance page."""
-    return templates.TemplateResponse(
-        "attendance/mark.html",
-        {"request": request, "title": "Mark Attendance", "user": user, "messages": []}
+    from app.core.metrics import metrics
+
+    try:
+        client = ip_address(request.client.host) if request.client else None
+    except ValueError:
+        client = None
+    if client is None or not any(client in network for network in request.app.state.metrics_networks):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+async def password_hasher_busy_handler(request, exc):
+    """Shed login load instead of queueing bcrypt work without bound."""
+    from fastapi.responses import JSONResponse
+
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many login attempts in progress, please retry shortly"},
+        headers={"Retry-After": "1"},
     )
 
 
-@app.get("/reports")
-async def reports_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    """Render the reports page."""
-    return templates.TemplateResponse(
-        "reports/index.html",
-        {"request": request, "title": "Reports", "user": user, "messages": []}
+def create_app() -> FastAPI:
+    """Build the application: middleware, routers, pages and static files."""
+    from ipaddress import ip_network
+
+    from starlette.middleware.cors import CORSMiddleware
+
+    from app import pages
+    from app.api.dependencies import oauth2_scheme
+    from app.api.v1 import attendance, auth, reports, sessions, students
+    from app.core.assets import FingerprintedStaticFiles
+    from app.core.attendance_index import attendance_index
+    from app.core.cache import principal_cache
+    from app.core.coherence import ATTENDANCE, ROSTER, SESSIONS, CacheCoherenceMiddleware, cache_coherence
+    from app.core.compression import CompressionMiddleware
+    from app.core.config import get_settings
+    from app.core.metrics import MetricsMiddleware, metrics
+    from app.core.query_log import QueryLogMiddleware, query_log
+    from app.core.security import PasswordHasherBusy, age_cache, password_hasher
+    from app.core.session_purge import session_purger
+
+    settings = get_settings()
+    principal_cache.configure(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+    oauth2_scheme.model.flows.password.tokenUrl = f"{settings.API_V1_STR}/auth/login"
+    pages.init_templates()
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        version=settings.VERSION,
+        lifespan=lifespan
+    )
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.ALLOWED_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
+    if settings.CACHE_COHERENCE_ENABLED:
+        app.add_middleware(CacheCoherenceMiddleware, coherence=cache_coherence)
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+    if settings.SLOW_QUERY_LOG_ENABLED:
+        app.add_middleware(QueryLogMiddleware, query_log=query_log)
+    if settings.METRICS_ENABLED:
+        # Outermost, so timings include compression and CORS handling
+        app.add_middleware(MetricsMiddleware)
+        metrics.register_gauges("principal_cache", "Principal cache statistics.", principal_cache.stats)
+        metrics.register_gauges("age_cache", "Decrypted age cache statistics.", age_cache.stats)
+        metrics.register_gauges("attendance_index", "In-memory attendance index size.", attendance_index.stats)
+        metrics.register_gauges("session_purge", "Background session purge statistics.", session_purger.stats)
+        metrics.register_gauges("cache_coherence", "Cross-worker cache coherence checks.", cache_coherence.stats)
+        metrics.register_gauges("query_log", "Slow-query log and N+1 detector counts.", query_log.stats)
+        metrics.register_gauges(
+            "password_hasher", "bcrypt jobs queued or running.", lambda: {"in_flight": password_hasher.in_flight}
+        )
+        app.state.metrics_networks = [ip_network(ip, strict=False) for ip in settings.METRICS_ALLOWED_IPS]
+        app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+    cache_coherence.subscribe(ROSTER, _sync_roster_version)
+    cache_coherence.subscribe(SESSIONS, _drop_principals)
+    cache_coherence.subscribe(ATTENDANCE, _reload_attendance_index)
 
+    app.add_exception_handler(PasswordHasherBusy, password_hasher_busy_handler)
 
-@app.get("/sessions")
-async def sessions_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
-    """Render a simple sessions (devices) page placeholder."""
-    return templates.TemplateResponse(
-        "base.html",
-        {"request": request, "title": "Devices", "user": user, "messages": []}
+    app.mount(
+        "/static",
+        FingerprintedStaticFiles(directory=pages.static_dir, manifest=pages.asset_manifest),
+        name="static"
     )
+    app.include_router(pages.router)
+    app.include_router(auth.router, prefix=settings.API_V1_STR)
+    app.include_router(students.router, prefix=settings.API_V1_STR)
+    app.include_router(attendance.router, prefix=settings.API_V1_STR)
+    app.include_router(sessions.router, prefix=settings.API_V1_STR)
+    app.include_router(reports.router, prefix=settings.API_V1_STR)
+    return app
 
-# Import and include routers
-from app.api.v1 import auth, students, attendance, sessions
 
-app.include_router(auth.router, prefix=settings.API_V1_STR)
-app.include_router(students.router, prefix=settings.API_V1_STR)
-app.include_router(attendance.router, prefix=settings.API_V1_STR)
-app.include_router(sessions.router, prefix=settings.API_V1_STR)
+def __getattr__(name: str):
+    # Build the module-level ``app`` on first access only
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
-        "main:app",
+        "app.main:create_app",
+        factory=True,
         host="127.0.0.1",
         port=8000,
         reload=True
-    )
\ No newline at end of file
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Index, String, UniqueConstraint
 from sqlalchemy.sql import func
 from ..core.database import Base
 
@@ -7,10 +7,20 @@ class Attendance(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), index=True)
-    date = Column(Date, index=True)
+    date = Column(Date)
     marked_by_user_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     __table_args__ = (
         UniqueConstraint('student_id', 'date', name='uix_student_date'),
-    )
\ No newline at end of file
+        # Keyset pagination seeks on (date, id); student filters use uix_student_date
+        Index('ix_attendance_date_id', 'date', 'id'),
+    )
+
+class AttendanceMonthly(Base):
+    """Per-student class count per calendar month, kept in step with ``attendance``."""
+    __tablename__ = "attendance_monthly"
+
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    year_month = Column(String(7), primary_key=True)  # "YYYY-MM"
+    class_count = Column(Integer, nullable=False, default=0)
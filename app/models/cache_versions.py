@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from ..core.database import Base
+
+class CacheVersion(Base):
+    """Shared change counter per cache namespace (see core.coherence)."""
+    __tablename__ = "cache_versions"
+
+    name = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
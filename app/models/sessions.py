@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, LargeBinary, String, DateTime, ForeignKey
 from sqlalchemy.sql import func
 from ..core.database import Base
 
@@ -8,7 +8,8 @@ class Session(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True)
     device_name = Column(String)
-    session_token = Column(String, unique=True, index=True)
+    # 16 bytes from the token's jti claim (see security.session_key)
+    session_key = Column(LargeBinary(16), unique=True, index=True, nullable=False)
     ip_address = Column(String)
     user_agent = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
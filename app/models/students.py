@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, LargeBinary, Numeric, DateTime
+import math
+from datetime import date
+from sqlalchemy import Column, Date, ForeignKey, Integer, String, LargeBinary, Numeric, DateTime
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
-from ..core.security import encrypt_age, decrypt_age
+from ..core.security import age_cache, encrypt_age, decrypt_age, decrypt_ages
+
+# effective_from of a student's first price: it applies to all earlier dates
+PRICE_HISTORY_START = date.min
 
 class Student(Base):
     __tablename__ = "students"
@@ -10,28 +16,54 @@ class Student(Base):
     name = Column(String, index=True)
     age_ciphertext = Column(LargeBinary)
     level = Column(String)
-    price_per_class = Column(Numeric(10, 2))
+    price_per_class = Column(Numeric(10, 2))  # price in effect today; history in student_prices
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Only written through; fees read the history with set-based queries
+    prices = relationship("StudentPrice", lazy="raise")
+
     def set_age(self, age: int):
+        if self.age_ciphertext is not None:
+            age_cache.pop(self.age_ciphertext)
         self.age_ciphertext = encrypt_age(age)
+        age_cache.set(self.age_ciphertext, age)
 
-    def __init__(self, name: str, level: str, price_per_class, **kwargs):
-        # Basic validation required by tests: non-empty name and positive price
+    @staticmethod
+    def prefetch_ages(students) -> None:
+        """Decrypt the ages of a result set in one batch before serialization."""
+        decrypt_ages([s.age_ciphertext for s in students])
+
+    @staticmethod
+    def validate(name: str, price_per_class) -> None:
+        """Basic validation required by tests: non-empty name and positive price."""
+        Student.validate_name(name)
+        Student.validate_price(price_per_class)
+
+    @staticmethod
+    def validate_name(name: str) -> None:
         if not name or not str(name).strip():
             raise ValueError("Student name must not be empty")
+
+    @staticmethod
+    def validate_price(price_per_class) -> None:
         try:
             price_val = float(price_per_class)
         except Exception:
             raise ValueError("price_per_class must be a number")
+        if not math.isfinite(price_val):
+            raise ValueError("price_per_class must be a finite number")
         if price_val <= 0:
             raise ValueError("price_per_class must be positive")
 
+    def __init__(self, name: str, level: str, price_per_class, **kwargs):
+        Student.validate(name, price_per_class)
+
         # Assign validated fields
         self.name = name
         self.level = level
         self.price_per_class = price_per_class
+        self.prices.append(StudentPrice(effective_from=PRICE_HISTORY_START, price=price_per_class))
         # Allow SQLAlchemy to handle other kwargs like id/created_at
         for k, v in kwargs.items():
             setattr(self, k, v)
@@ -42,4 +74,15 @@ class Student(Base):
     @property
     def age(self) -> int:
         """Expose decrypted age as a property for Pydantic serialization."""
-        return self.get_age()
\ No newline at end of file
+        return self.get_age()
+
+class StudentPrice(Base):
+    """Price per class in effect from ``effective_from`` until the student's next price."""
+    __tablename__ = "student_prices"
+
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    effective_from = Column(Date, primary_key=True)
+    price = Column(Numeric(10, 2), nullable=False)
+
+    # Clustered on the key, so a student's history is read in date order
+    __table_args__ = {"sqlite_with_rowid": False}
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, String, DateTime, Boolean
 from sqlalchemy.sql import func
 from ..core.database import Base
-from ..core.security import get_password_hash
+from ..core.security import get_password_hash, get_password_hash_async
 
 class User(Base):
     __tablename__ = "users"
@@ -14,4 +14,8 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     def set_password(self, password: str):
-        self.password_hash = get_password_hash(password)
\ No newline at end of file
+        self.password_hash = get_password_hash(password)
+
+    async def set_password_async(self, password: str):
+        """``set_password`` for async callers: hashes on the bcrypt pool, off the event loop."""
+        self.password_hash = await get_password_hash_async(password)
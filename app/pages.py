@@ -0,0 +1,215 @@
+"""Server-rendered HTML pages and the browser login/logout form handlers."""
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Form, Request, Response
+from fastapi.responses import RedirectResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import select
+
+from app.api.dependencies import get_optional_current_user
+from app.core.assets import AssetManifest
+from app.core.cache import principal_cache
+from app.core.coherence import SESSIONS, cache_coherence
+from app.core.config import get_settings
+from app.core.database import get_db
+from app.core.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    new_session_id,
+    session_key,
+    token_session_key,
+    verify_password_async,
+)
+from app.models.users import User
+
+router = APIRouter()
+
+# Static files and templates
+static_dir = Path(__file__).parent / "static"
+asset_manifest = AssetManifest(static_dir)
+templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
+templates.env.globals["asset_url"] = lambda path: f"/static/{asset_manifest.hashed_path(path)}"
+
+
+def init_templates() -> None:
+    """Apply the TEMPLATE_* settings to the Jinja2 environment."""
+    settings = get_settings()
+    # Compiled template code is shared across workers/restarts via the bytecode cache
+    templates.env.bytecode_cache = FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR)
+    templates.env.auto_reload = settings.TEMPLATE_AUTO_RELOAD
+
+
+def precompile_templates() -> None:
+    """Load every template once so the first page view pays no compile cost."""
+    for name in templates.env.list_templates(extensions=["html"]):
+        templates.env.get_template(name)
+
+@router.get("/")
+async def root(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    """Render the homepage."""
+    return templates.TemplateResponse(
+        "base.html",
+        {"request": request, "title": get_settings().PROJECT_NAME, "user": user, "messages": []}
+    )
+
+
+@router.get("/students")
+async def students_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    """Render the students list page (frontend)."""
+    return templates.TemplateResponse(
+        "students/list.html",
+        {"request": request, "title": "Students", "user": user, "messages": []}
+    )
+
+
+@router.get("/students/create")
+async def create_student_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    """Render the create student page."""
+    return templates.TemplateResponse(
+        "students/create.html",
+        {"request": request, "title": "Add Student", "user": user, "messages": []}
+    )
+
+
+@router.get("/students/{student_id}")
+async def view_student_page(student_id: int, request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    """Render the view student page."""
+    return templates.TemplateResponse(
+        "students/view.html",
+        {"request": request, "title": "Student Details", "user": user, "messages": []}
+    )
+
+
+@router.get("/students/{student_id}/edit", name="edit_student")
+async def edit_student_page(student_id: int, request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    """Render the edit student page."""
+    return templates.TemplateResponse(
+        "students/edit.html",
+        {"request": request, "title": "Edit Student", "user": user, "messages": []}
+    )
+
+
+
+# GET: Render login page
+@router.get("/auth/login")
+async def login_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    return templates.TemplateResponse(
+        "auth/login.html",
+        {"request": request, "title": "Login", "user": user, "messages": []}
+    )
+
+# POST: Handle login form, set cookie, redirect
+@router.post("/auth/login")
+async def login_form(
+    request: Request,
+    response: Response,
+    username: str = Form(...),
+    password: str = Form(...),
+    db=Depends(get_db)
+):
+    from app.models.sessions import Session
+    
+    stmt = select(User).where(User.username == username)
+    result = await db.execute(stmt)
+    user = result.scalar_one_or_none()
+    try:
+        valid = user is not None and await verify_password_async(password, user.password_hash)
+    except PasswordHasherBusy:
+        return templates.TemplateResponse(
+            "auth/login.html",
+            {"request": request, "title": "Login", "user": None, "messages": [{"type": "warning", "text": "Server busy, please try again"}]},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
+    if not valid:
+        # Show error on login page
+        return templates.TemplateResponse(
+            "auth/login.html",
+            {"request": request, "title": "Login", "user": None, "messages": [{"type": "danger", "text": "Invalid credentials"}]},
+            status_code=401
+        )
+    
+    # Create access token
+    jti = new_session_id()
+    access_token = create_access_token(data={"sub": user.username}, jti=jti)
+    
+    # Create session record in database
+    session = Session(
+        user_id=user.id,
+        device_name=request.headers.get("User-Agent", "Unknown Device"),
+        session_key=session_key(access_token, jti),
+        ip_address=request.client.host if request.client else "unknown",
+        user_agent=request.headers.get("User-Agent")
+    )
+    db.add(session)
+    await db.commit()
+    
+    # Redirect and set cookie
+    redirect = RedirectResponse(url="/students", status_code=303)
+    redirect.set_cookie(
+        key="session",
+        value=access_token,
+        httponly=True,
+        samesite="lax",
+        max_age=get_settings().ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
+    return redirect
+
+
+@router.post("/auth/logout")
+async def logout_form(
+    request: Request,
+    response: Response,
+    db=Depends(get_db)
+):
+    """Handle logout from browser form, delete session cookie and redirect."""
+    from app.models.sessions import Session
+    session_token = request.cookies.get("session")
+    if session_token:
+        await db.execute(
+            Session.__table__.delete().where(Session.session_key == token_session_key(session_token))
+        )
+        await cache_coherence.commit(db, SESSIONS)
+        principal_cache.invalidate_token(session_token)
+    
+    redirect = RedirectResponse(url="/auth/login", status_code=303)
+    redirect.delete_cookie(key="session")
+    return redirect
+
+
+@router.get("/attendance")
+async def attendance_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    """Render the attendance list page."""
+    return templates.TemplateResponse(
+        "attendance/list.html",
+        {"request": request, "title": "Attendance", "user": user, "messages": []}
+    )
+
+
+@router.get("/attendance/mark")
+async def mark_attendance_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    """Render the mark attendance page."""
+    return templates.TemplateResponse(
+        "attendance/mark.html",
+        {"request": request, "title": "Mark Attendance", "user": user, "messages": []}
+    )
+
+
+@router.get("/reports")
+async def reports_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    """Render the reports page."""
+    return templates.TemplateResponse(
+        "reports/index.html",
+        {"request": request, "title": "Reports", "user": user, "messages": []}
+    )
+
+
+@router.get("/sessions")
+async def sessions_page(request: Request, user: Optional[User] = Depends(get_optional_current_user)):
+    """Render a simple sessions (devices) page placeholder."""
+    return templates.TemplateResponse(
+        "base.html",
+        {"request": request, "title": "Devices", "user": user, "messages": []}
+    )
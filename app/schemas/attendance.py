@@ -1,4 +1,5 @@
 from datetime import date, datetime
+from typing import List, Optional
 from pydantic import BaseModel
 
 class AttendanceBase(BaseModel):
@@ -14,4 +15,33 @@ class Attendance(AttendanceBase):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AttendanceBulkCreate(BaseModel):
+    date: date
+    student_ids: List[int]
+
+class AttendanceBulkResult(BaseModel):
+    student_id: int
+    status: str  # "marked", "duplicate" or "not_found"
+    attendance_id: Optional[int] = None
+
+class AttendanceIndexStats(BaseModel):
+    loaded: bool
+    reloads: int
+    students: int
+    chunks: int
+    days_marked: int
+    bitmap_bytes: int
+    approx_bytes: int
+
+class AttendanceIndexEntry(BaseModel):
+    student_id: int
+    date: date
+
+class AttendanceIndexCheck(BaseModel):
+    consistent: bool
+    missing_count: int
+    extra_count: int
+    missing: List[AttendanceIndexEntry]
+    extra: List[AttendanceIndexEntry]
@@ -0,0 +1,44 @@
+from datetime import date
+from decimal import Decimal
+from typing import List
+from pydantic import BaseModel
+
+class StudentSummary(BaseModel):
+    student_id: int
+    name: str
+    level: str
+    classes_attended: int
+    price_per_class: Decimal
+    total_fee: Decimal
+
+class SummaryReport(BaseModel):
+    start_date: date
+    end_date: date
+    students: List[StudentSummary]
+    grand_total: Decimal
+
+class FeePeriod(BaseModel):
+    start_date: date
+    end_date: date
+    price_per_class: Decimal
+    classes_attended: int
+    fee: Decimal
+
+class StudentFees(BaseModel):
+    student_id: int
+    name: str
+    level: str
+    classes_attended: int
+    total_fee: Decimal
+    periods: List[FeePeriod]  # one per price in effect during the range
+
+class FeeReport(BaseModel):
+    start_date: date
+    end_date: date
+    students: List[StudentFees]
+    grand_total: Decimal
+
+class IndividualReportRequest(BaseModel):
+    student_ids: List[int]
+    start_date: date
+    end_date: date
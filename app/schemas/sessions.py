@@ -8,7 +8,7 @@ class SessionBase(BaseModel):
 
 class SessionCreate(SessionBase):
     user_id: int
-    session_token: str
+    session_key: bytes
 
 class Session(SessionBase):
     id: int
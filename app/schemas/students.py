@@ -1,6 +1,6 @@
-from pydantic import BaseModel, condecimal
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, condecimal, conint
+from datetime import date, datetime
+from typing import List, Optional
 from decimal import Decimal
 
 class StudentBase(BaseModel):
@@ -10,11 +10,11 @@ class StudentBase(BaseModel):
     price_per_class: condecimal(max_digits=10, decimal_places=2)
 
 class StudentCreate(StudentBase):
-    pass
+    age: conint(ge=0)
 
 class StudentUpdate(StudentBase):
     name: Optional[str] = None
-    age: Optional[int] = None
+    age: Optional[conint(ge=0)] = None
     level: Optional[str] = None
     price_per_class: Optional[Decimal] = None
 
@@ -24,4 +24,25 @@ class Student(StudentBase):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class StudentPriceBase(BaseModel):
+    effective_from: date
+    price: condecimal(max_digits=10, decimal_places=2)
+
+class StudentPriceCreate(StudentPriceBase):
+    pass
+
+class StudentPrice(StudentPriceBase):
+    # The first price has effective_from 0001-01-01: it covers all earlier dates
+    class Config:
+        from_attributes = True
+
+class StudentImportRowError(BaseModel):
+    row: int  # 1-based CSV record number; the header is row 1
+    errors: List[str]
+
+class StudentImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[StudentImportRowError]
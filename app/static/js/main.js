@@ -42,9 +42,10 @@ document.addEventListener('DOMContentLoaded', function() {
         if (bsModal) bsModal.hide();
 
         try {
-            const attendanceResp = await fetch(`/api/v1/attendance/?student_id=${studentId}&start_date=${startDate}&end_date=${endDate}`, { credentials: 'include' });
-            if (!attendanceResp.ok) throw new Error('Failed to fetch attendance');
-            const attendance = await attendanceResp.json();
+            const [attendance, fees] = await Promise.all([
+                fetchAllAttendance({ student_id: studentId, start_date: startDate, end_date: endDate }),
+                fetchStudentFees(studentId, startDate, endDate)
+            ]);
 
             const { jsPDF } = window.jspdf;
             const doc = new jsPDF();
@@ -57,14 +58,11 @@ document.addEventListener('DOMContentLoaded', function() {
             doc.text(`Period: ${new Date(startDate).toLocaleDateString()} - ${new Date(endDate).toLocaleDateString()}`, pageWidth / 2, 35, { align: 'center' });
 
             const classes = attendance.length;
-            let pricePerClass = 0;
-            const found = studentsData.find(x => x.id == studentId);
-            if (found) pricePerClass = parseFloat(found.price_per_class || 0);
-            const totalFees = classes * pricePerClass;
+            const totalFees = parseFloat(fees.total_fee);
 
             doc.setFontSize(11);
             doc.text(`Classes Attended: ${classes}`, 20, 45);
-            doc.text(`Price per Class: £${pricePerClass.toFixed(2)}`, 20, 52);
+            doc.text(`Price per Class: ${formatPriceRange(fees)}`, 20, 52);
             doc.setFont(undefined, 'bold');
             doc.text(`Total Fees: £${totalFees.toFixed(2)}`, 20, 59);
             doc.setFont(undefined, 'normal');
@@ -97,6 +95,39 @@ function confirmAction(message) {
     return confirm(message || 'Are you sure you want to perform this action?');
 }
 
+// Fetch every attendance record matching the filters, following the
+// X-Next-Cursor header returned by the paginated list endpoint
+async function fetchAllAttendance(filters = {}) {
+    const records = [];
+    let cursor = null;
+    do {
+        const params = new URLSearchParams({ ...filters, limit: 1000 });
+        if (cursor) params.set('cursor', cursor);
+        const resp = await fetch(`/api/v1/attendance/?${params}`, { credentials: 'include' });
+        if (!resp.ok) throw new Error('Failed to fetch attendance');
+        records.push(...await resp.json());
+        cursor = resp.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return records;
+}
+
+// Fees for one student, charged at the price in effect on each class date
+async function fetchStudentFees(studentId, startDate, endDate) {
+    const params = new URLSearchParams({ student_id: studentId, start_date: startDate, end_date: endDate });
+    const resp = await fetch(`/api/v1/reports/fees?${params}`, { credentials: 'include' });
+    if (!resp.ok) throw new Error('Failed to fetch fees');
+    return (await resp.json()).students[0];
+}
+
+// "£10.00", or "£10.00 - £12.50" when the price changed within the range
+function formatPriceRange(fees) {
+    const prices = fees.periods.map(p => parseFloat(p.price_per_class));
+    if (prices.length === 0) return '-';
+    const low = Math.min(...prices);
+    const high = Math.max(...prices);
+    return low === high ? `£${low.toFixed(2)}` : `£${low.toFixed(2)} - £${high.toFixed(2)}`;
+}
+
 // Format currency
 function formatCurrency(amount) {
     return new Intl.NumberFormat('en-GB', {
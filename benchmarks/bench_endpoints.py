@@ -0,0 +1,314 @@
+"""Endpoint latency benchmarks against a seeded database.
+
+Run from the project root:
+
+    python -m benchmarks.bench_endpoints run --db bench.db --students 5000 \
+        --attendance 2000000 --requests 200 --concurrency 8 --output results.json
+    python -m benchmarks.bench_endpoints run --db bench.db --reuse \
+        --baseline baseline.json --output results.json
+    python -m benchmarks.bench_endpoints compare baseline.json results.json
+
+Requests go through ``httpx.AsyncClient`` over ``ASGITransport``, like the
+tests, but against the real application wiring: ``DATABASE_URL`` points at the
+benchmark database and the app's lifespan runs, so engines, pragmas, caches
+and the attendance index behave as in production. Each scenario reports
+p50/p95/p99 latency and throughput; ``compare`` (or ``run --baseline``) flags
+scenarios whose p95 or throughput regressed by more than ``--threshold`` and
+exits non-zero.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from benchmarks.dataset import BENCH_PASSWORD, BENCH_USERNAME, seed
+
+Scenario = Callable[["BenchContext", int], Awaitable[int]]
+
+
+class BenchContext:
+    """Shared state for scenarios: the client, auth headers and the dataset shape."""
+
+    def __init__(self, client, headers: Dict[str, str], students: int, days: int, rng: random.Random):
+        self.client = client
+        self.headers = headers
+        self.students = students
+        self.days = days
+        self.rng = rng
+        self.marked: List[int] = []
+
+    def student_id(self) -> int:
+        return self.rng.randint(1, self.students)
+
+    def past_date(self) -> date:
+        return date.today() - timedelta(days=self.rng.randrange(self.days))
+
+
+async def login(ctx: BenchContext, i: int) -> int:
+    response = await ctx.client.post(
+        "/api/v1/auth/login", data={"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+    )
+    return response.status_code
+
+
+async def list_students(ctx: BenchContext, i: int) -> int:
+    response = await ctx.client.get("/api/v1/students/", params={"limit": 100}, headers=ctx.headers)
+    return response.status_code
+
+
+async def list_attendance(ctx: BenchContext, i: int) -> int:
+    response = await ctx.client.get(
+        "/api/v1/attendance/", params={"student_id": ctx.student_id()}, headers=ctx.headers
+    )
+    return response.status_code
+
+
+async def list_attendance_by_date(ctx: BenchContext, i: int) -> int:
+    day = ctx.past_date()
+    response = await ctx.client.get(
+        "/api/v1/attendance/",
+        params={"start_date": str(day - timedelta(days=6)), "end_date": str(day)},
+        headers=ctx.headers,
+    )
+    return response.status_code
+
+
+async def mark_attendance(ctx: BenchContext, i: int) -> int:
+    # Future dates never collide with the seeded history
+    student_id = i % ctx.students + 1
+    day = date.today() + timedelta(days=1 + i // ctx.students)
+    response = await ctx.client.post(
+        "/api/v1/attendance/", json={"student_id": student_id, "date": str(day)}, headers=ctx.headers
+    )
+    if response.status_code == 200:
+        ctx.marked.append(response.json()["id"])
+    return response.status_code
+
+
+async def delete_attendance(ctx: BenchContext, i: int) -> int:
+    if not ctx.marked:
+        return 404
+    response = await ctx.client.delete(f"/api/v1/attendance/{ctx.marked.pop()}", headers=ctx.headers)
+    return response.status_code
+
+
+async def summary_report(ctx: BenchContext, i: int) -> int:
+    end = ctx.past_date()
+    response = await ctx.client.get(
+        "/api/v1/reports/summary",
+        params={"start_date": str(end - timedelta(days=90)), "end_date": str(end)},
+        headers=ctx.headers,
+    )
+    return response.status_code
+
+
+async def fees_report(ctx: BenchContext, i: int) -> int:
+    # The whole seeded history, so every price change falls inside the range
+    end = date.today()
+    response = await ctx.client.get(
+        "/api/v1/reports/fees",
+        params={"start_date": str(end - timedelta(days=ctx.days)), "end_date": str(end)},
+        headers=ctx.headers,
+    )
+    return response.status_code
+
+
+async def individual_reports(ctx: BenchContext, i: int) -> int:
+    end = ctx.past_date()
+    response = await ctx.client.post(
+        "/api/v1/reports/individual.zip",
+        json={
+            "student_ids": [ctx.student_id() for _ in range(5)],
+            "start_date": str(end - timedelta(days=30)),
+            "end_date": str(end),
+        },
+        headers=ctx.headers,
+    )
+    return response.status_code
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": login,
+    "list_students": list_students,
+    "list_attendance": list_attendance,
+    "list_attendance_by_date": list_attendance_by_date,
+    "mark_attendance": mark_attendance,
+    "delete_attendance": delete_attendance,
+    "summary_report": summary_report,
+    "fees_report": fees_report,
+    "individual_reports": individual_reports,
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_scenario(ctx: BenchContext, scenario: Scenario, requests: int, concurrency: int, warmup: int) -> dict:
+    for i in range(warmup):
+        await scenario(ctx, requests + i)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            status = await scenario(ctx, i)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def run(args) -> dict:
+    db_path = Path(args.db).resolve()
+    # Settings are cached on first use (seeding included), so configure them first
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ.setdefault("MAX_DEVICES_PER_USER", str(10 ** 9))
+    if args.reuse and db_path.exists():
+        dataset = {"students": args.students, "days": args.days, "reused": True}
+    else:
+        dataset = seed(str(db_path), args.students, args.attendance, args.days, args.seed, args.price_changes)
+
+    from httpx import ASGITransport, AsyncClient
+
+    from app.main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post(
+                "/api/v1/auth/login", data={"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+            )
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            client.cookies.clear()
+            ctx = BenchContext(client, headers, args.students, args.days, random.Random(args.seed))
+
+            for name in args.scenarios:
+                requests = args.requests
+                if name == "delete_attendance":
+                    # Only rows created by mark_attendance are deleted
+                    requests = min(requests, max(0, len(ctx.marked) - args.warmup))
+                result = await run_scenario(ctx, SCENARIOS[name], requests, args.concurrency, args.warmup)
+                results[name] = result
+                print(
+                    f"{name:<24} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+                    f"p99 {result['p99_ms']:>9.2f}ms  {result['throughput_rps']:>9.1f} req/s  "
+                    f"errors {result['errors']}"
+                )
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": dataset,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """Describe every scenario whose p95 or throughput regressed past ``threshold``."""
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if before["throughput_rps"] and now["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} req/s"
+            )
+        if now["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {now['errors']}")
+    return regressions
+
+
+def report_regressions(baseline: dict, current: dict, threshold: float) -> int:
+    regressions = compare(baseline, current, threshold)
+    if not regressions:
+        print(f"No regressions beyond {threshold:.0%}.")
+        return 0
+    print(f"Regressions beyond {threshold:.0%}:")
+    for line in regressions:
+        print(f"  {line}")
+    return 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed (or reuse) a database and run the scenarios")
+    run_parser.add_argument("--db", default="bench.db")
+    run_parser.add_argument("--reuse", action="store_true", help="keep an existing --db instead of reseeding")
+    run_parser.add_argument("--students", type=int, default=5000)
+    run_parser.add_argument("--attendance", type=int, default=2_000_000)
+    run_parser.add_argument("--days", type=int, default=730)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--price-changes", type=int, default=8, help="price changes per student")
+    run_parser.add_argument("--requests", type=int, default=200)
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--warmup", type=int, default=5)
+    run_parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    run_parser.add_argument("--output", help="write results as JSON to this file")
+    run_parser.add_argument("--baseline", help="compare against a stored results file")
+    run_parser.add_argument("--threshold", type=float, default=0.10)
+
+    compare_parser = commands.add_parser("compare", help="compare two stored results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        baseline = json.loads(Path(args.baseline).read_text())
+        current = json.loads(Path(args.current).read_text())
+        return report_regressions(baseline, current, args.threshold)
+
+    results = asyncio.run(run(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        return report_regressions(json.loads(Path(args.baseline).read_text()), results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Micro-benchmark: list response serialization, Pydantic path vs fast path.
+
+Run from the project root:
+
+    python -m benchmarks.bench_serialization --rows 20000
+
+The "pydantic" figure mirrors what FastAPI does for ``response_model=List[...]``
+(validate from attributes, then jsonable_encoder + json.dumps); "fast" is the
+plain-row path used when ``FAST_LIST_RESPONSES`` is enabled.
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.serialization import dumps, orjson
+from app.schemas.attendance import Attendance as AttendanceSchema
+from app.schemas.students import Student as StudentSchema
+
+
+def make_students(n: int):
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        {
+            "name": f"Student {i}",
+            "age": 20 + i % 30,
+            "level": "Intermediate",
+            "price_per_class": Decimal("12.50"),
+            "id": i,
+            "created_at": now,
+            "updated_at": None,
+        }
+        for i in range(n)
+    ]
+
+
+def make_attendance(n: int):
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        {
+            "student_id": i % 500,
+            "date": date(2020, 1, 1) + timedelta(days=i % 1500),
+            "id": i,
+            "marked_by_user_id": 1,
+            "created_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+def pydantic_path(adapter: TypeAdapter, objects) -> bytes:
+    validated = adapter.validate_python(objects, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def time_it(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"rows={args.rows} encoder={'orjson' if orjson else 'json'}")
+    cases = [
+        ("students", StudentSchema, make_students(args.rows)),
+        ("attendance", AttendanceSchema, make_attendance(args.rows)),
+    ]
+    for name, schema, rows in cases:
+        adapter = TypeAdapter(List[schema])
+        objects = [SimpleNamespace(**row) for row in rows]
+        slow = time_it(lambda: pydantic_path(adapter, objects), args.repeat)
+        fast = time_it(lambda: dumps(rows), args.repeat)
+        print(
+            f"{name:<11} pydantic {args.rows / slow:>12,.0f} rows/s   "
+            f"fast {args.rows / fast:>12,.0f} rows/s   x{slow / fast:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
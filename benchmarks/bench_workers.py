@@ -0,0 +1,292 @@
+"""Multi-worker load test: read throughput versus uvicorn worker count.
+
+Run from the project root:
+
+    python -m benchmarks.bench_workers --db bench.db --workers 1 2 4 \
+        --duration 20 --clients 4 --concurrency 16 --output workers.json
+    python -m benchmarks.bench_workers --db bench.db --reuse --min-efficiency 0.8
+
+For each worker count a real ``uvicorn --workers N`` server is started on the
+benchmark database with ``CACHE_COHERENCE_ENABLED`` on, as ``start.sh`` does.
+Load comes from ``--clients`` separate processes so the generator is not the
+bottleneck; each runs ``--concurrency`` connections over the read scenarios
+of ``bench_endpoints`` for ``--duration`` seconds. The report shows
+throughput, p95 latency, speedup over the first worker count and scaling
+efficiency (speedup / worker ratio); ``--min-efficiency`` makes the run fail
+when scaling falls below it.
+
+Before measuring, every server is also checked for coherence: after a roster
+write and a logout on one connection, fresh connections (spread over all
+workers by the kernel) must never see a stale ETag or accept the revoked
+token.
+
+Scaling is bounded by the cores available to server *and* clients; the
+report records ``os.cpu_count()`` so results from small machines are not
+mistaken for a regression.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.bench_endpoints import SCENARIOS, BenchContext, percentile
+from benchmarks.dataset import BENCH_PASSWORD, BENCH_USERNAME, seed
+
+READ_SCENARIOS = ("list_students", "list_attendance", "list_attendance_by_date", "summary_report")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--no-access-log", "--log-level", "warning",
+        ],
+        env=env,
+        start_new_session=True,
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
+async def wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    from httpx import AsyncClient, HTTPError
+
+    deadline = time.monotonic() + timeout
+    async with AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with status {process.returncode}")
+            try:
+                if (await client.get("/auth/login")).status_code == 200:
+                    return
+            except HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def login(client) -> Dict[str, str]:
+    response = await client.post(
+        "/api/v1/auth/login", data={"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+    client.cookies.clear()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def check_coherence(base_url: str, workers: int) -> dict:
+    """Writes on one connection must be visible on fresh connections to every worker."""
+    from httpx import AsyncClient
+
+    probes = max(8, workers * 8)
+    fresh = {"Connection": "close"}
+    async with AsyncClient(base_url=base_url) as client:
+        headers = await login(client)
+        # Warm every worker's roster ETag and principal cache
+        revoked = await login(client)
+        for _ in range(probes):
+            await client.get("/api/v1/students/", params={"limit": 10}, headers={**revoked, **fresh})
+        etag = (await client.get("/api/v1/students/", params={"limit": 10}, headers=headers)).headers["ETag"]
+
+        created = await client.post(
+            "/api/v1/students/",
+            json={"name": "Coherence Probe", "age": 30, "level": "Beginner", "price_per_class": "10.00"},
+            headers=headers,
+        )
+        created.raise_for_status()
+        client.cookies.set("session", revoked["Authorization"].split()[1])
+        (await client.post("/api/v1/auth/logout")).raise_for_status()
+        client.cookies.clear()
+
+        stale_etags = revoked_accepted = 0
+        for _ in range(probes):
+            response = await client.get(
+                "/api/v1/students/", params={"limit": 10},
+                headers={**headers, **fresh, "If-None-Match": etag},
+            )
+            stale_etags += response.status_code == 304
+            response = await client.get("/api/v1/students/", params={"limit": 10}, headers={**revoked, **fresh})
+            revoked_accepted += response.status_code != 401
+        await client.delete(f"/api/v1/students/{created.json()['id']}", headers=headers)
+    return {"probes": probes, "stale_etags": stale_etags, "revoked_accepted": revoked_accepted}
+
+
+def client_process(base_url: str, headers: Dict[str, str], scenarios: List[str], students: int,
+                   days: int, concurrency: int, duration: float, seed_value: int) -> dict:
+    return asyncio.run(
+        _client_load(base_url, headers, scenarios, students, days, concurrency, duration, seed_value)
+    )
+
+
+async def _client_load(base_url, headers, scenarios, students, days, concurrency, duration, seed_value) -> dict:
+    from httpx import AsyncClient, Limits
+
+    latencies: List[float] = []
+    errors = 0
+    limits = Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        ctx = BenchContext(client, headers, students, days, random.Random(seed_value))
+        deadline = time.perf_counter() + duration
+
+        async def worker(n: int):
+            nonlocal errors
+            i = n
+            while time.perf_counter() < deadline:
+                scenario = SCENARIOS[scenarios[i % len(scenarios)]]
+                started = time.perf_counter()
+                status = await scenario(ctx, i)
+                latencies.append(time.perf_counter() - started)
+                errors += status >= 400
+                i += concurrency
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {"latencies": latencies, "errors": errors, "elapsed": elapsed}
+
+
+async def measure(args, workers: int, env: Dict[str, str]) -> dict:
+    from httpx import AsyncClient
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = start_server(workers, port, env)
+    try:
+        await wait_ready(base_url, process)
+        coherence = await check_coherence(base_url, workers)
+        async with AsyncClient(base_url=base_url) as client:
+            headers = await login(client)
+
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.clients) as pool:
+            results = await loop.run_in_executor(None, lambda: pool.starmap(client_process, [
+                (base_url, headers, args.scenarios, args.students, args.days,
+                 args.concurrency, args.duration, args.seed + n)
+                for n in range(args.clients)
+            ]))
+    finally:
+        stop_server(process)
+
+    latencies = sorted(value for result in results for value in result["latencies"])
+    elapsed = max(result["elapsed"] for result in results)
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": sum(result["errors"] for result in results),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "coherence": coherence,
+    }
+
+
+async def run(args) -> dict:
+    db_path = Path(args.db).resolve()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite+aiosqlite:///{db_path}",
+        MAX_DEVICES_PER_USER=str(10 ** 9),
+        CACHE_COHERENCE_ENABLED="true",
+    )
+    os.environ.update(DATABASE_URL=env["DATABASE_URL"], MAX_DEVICES_PER_USER=env["MAX_DEVICES_PER_USER"])
+    if args.reuse and db_path.exists():
+        dataset = {"students": args.students, "days": args.days, "reused": True}
+    else:
+        dataset = seed(str(db_path), args.students, args.attendance, args.days, args.seed)
+
+    results = []
+    for workers in args.workers:
+        result = await measure(args, workers, env)
+        base = results[0] if results else result
+        speedup = result["throughput_rps"] / base["throughput_rps"] if base["throughput_rps"] else 0.0
+        result["speedup"] = round(speedup, 2)
+        result["efficiency"] = round(speedup / (workers / base["workers"]), 2)
+        results.append(result)
+        print(
+            f"workers {workers:>2}  {result['throughput_rps']:>9.1f} req/s  p95 {result['p95_ms']:>8.2f}ms  "
+            f"speedup {result['speedup']:>5.2f}x  efficiency {result['efficiency']:>5.0%}  "
+            f"errors {result['errors']}  stale etags {result['coherence']['stale_etags']}  "
+            f"revoked accepted {result['coherence']['revoked_accepted']}"
+        )
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "dataset": dataset,
+            "clients": args.clients,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "scenarios": args.scenarios,
+        },
+        "results": results,
+    }
+
+
+def failures(report: dict, min_efficiency: float) -> List[str]:
+    problems = []
+    for result in report["results"]:
+        coherence = result["coherence"]
+        if coherence["stale_etags"] or coherence["revoked_accepted"]:
+            problems.append(f"{result['workers']} workers: incoherent caches {coherence}")
+        if result["efficiency"] < min_efficiency:
+            problems.append(f"{result['workers']} workers: efficiency {result['efficiency']:.0%} < {min_efficiency:.0%}")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--reuse", action="store_true", help="keep an existing --db instead of reseeding")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--attendance", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=max(1, min(4, os.cpu_count() or 1)))
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per client process")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(READ_SCENARIOS))
+    parser.add_argument("--min-efficiency", type=float, default=0.0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    problems = failures(report, args.min_efficiency)
+    for line in problems:
+        print(f"FAIL {line}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
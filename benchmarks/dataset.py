@@ -0,0 +1,145 @@
+"""Synthetic dataset for the endpoint benchmarks.
+
+Run from the project root:
+
+    python -m benchmarks.dataset --db bench.db --students 5000 --attendance 2000000
+
+Builds a fresh SQLite database with the application's schema, one user
+(``bench`` / ``bench-password``), ``--students`` students with encrypted ages
+and roughly ``--attendance`` attendance rows spread over the last ``--days``
+days. Each student's price changes ``--price-changes`` times over that period,
+so fee reports have to split attendance across price intervals. Rows are written with ``executemany`` inside a single transaction with
+journaling relaxed, which is far faster than going through the API or ORM.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Iterator, Tuple
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-password"
+LEVELS = ("Beginner", "Intermediate", "Advanced")
+INSERT_CHUNK = 50_000
+
+
+def create_schema(path: str) -> None:
+    """Create every table from the models, as the test fixtures do."""
+    from sqlalchemy import create_engine
+
+    from app.core.database import Base
+    import app.models.attendance  # noqa: F401 - register tables on Base
+    import app.models.cache_versions  # noqa: F401
+    import app.models.sessions  # noqa: F401
+    import app.models.students  # noqa: F401
+    import app.models.users  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+
+def _attendance_rows(rng: random.Random, students: int, rows: int, days: int) -> Iterator[Tuple[int, str, int]]:
+    start = date.today() - timedelta(days=days - 1)
+    per_student = min(days, max(1, rows // students))
+    for student_id in range(1, students + 1):
+        for offset in sorted(rng.sample(range(days), per_student)):
+            yield student_id, (start + timedelta(days=offset)).isoformat(), 1
+
+
+def _price_rows(rng: random.Random, students: int, days: int, changes: int) -> Iterator[Tuple[int, str, str]]:
+    start = date.today() - timedelta(days=days - 1)
+    for student_id in range(1, students + 1):
+        cents = rng.choice((1000, 1250, 1500))
+        yield student_id, date.min.isoformat(), f"{cents / 100:.2f}"
+        for offset in sorted(rng.sample(range(1, days), min(changes, days - 1))):
+            cents += rng.choice((-50, 50, 100))
+            yield student_id, (start + timedelta(days=offset)).isoformat(), f"{cents / 100:.2f}"
+
+
+def _chunks(iterator, size):
+    chunk = []
+    for item in iterator:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def seed(path: str, students: int, attendance: int, days: int, seed: int = 42, price_changes: int = 8) -> dict:
+    """Build the benchmark database at ``path`` and describe what was written."""
+    from app.core.security import encrypt_ages, get_password_hash
+
+    if os.path.exists(path):
+        os.remove(path)
+    create_schema(path)
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    with conn:
+        conn.execute(
+            "INSERT INTO users (username, email, password_hash, is_active) VALUES (?, ?, ?, 1)",
+            (BENCH_USERNAME, "bench@example.com", get_password_hash(BENCH_PASSWORD)),
+        )
+        ages = [rng.randint(6, 70) for _ in range(students)]
+        conn.executemany(
+            "INSERT INTO students (id, name, age_ciphertext, level) VALUES (?, ?, ?, ?)",
+            (
+                (i + 1, f"Student {i + 1:06d}", ciphertext, rng.choice(LEVELS))
+                for i, ciphertext in enumerate(encrypt_ages(ages))
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO student_prices (student_id, effective_from, price) VALUES (?, ?, ?)",
+            _price_rows(rng, students, days, price_changes),
+        )
+        # The current price is the latest one, as the API keeps it
+        conn.execute(
+            "UPDATE students SET price_per_class = (SELECT price FROM student_prices p "
+            "WHERE p.student_id = students.id ORDER BY effective_from DESC LIMIT 1)"
+        )
+        attendance_rows = 0
+        for chunk in _chunks(_attendance_rows(rng, students, attendance, days), INSERT_CHUNK):
+            conn.executemany(
+                "INSERT INTO attendance (student_id, date, marked_by_user_id) VALUES (?, ?, ?)", chunk
+            )
+            attendance_rows += len(chunk)
+        conn.execute(
+            "INSERT INTO attendance_monthly (student_id, year_month, class_count) "
+            "SELECT student_id, strftime('%Y-%m', date), COUNT(*) FROM attendance "
+            "GROUP BY student_id, strftime('%Y-%m', date)"
+        )
+    conn.execute("ANALYZE")
+    conn.close()
+
+    return {
+        "students": students,
+        "attendance_rows": attendance_rows,
+        "days": days,
+        "price_changes": price_changes,
+        "seed": seed,
+        "seed_seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--attendance", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--price-changes", type=int, default=8, help="price changes per student")
+    args = parser.parse_args()
+    print(seed(args.db, args.students, args.attendance, args.days, args.seed, args.price_changes))
+
+
+if __name__ == "__main__":
+    main()
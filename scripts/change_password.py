@@ -7,7 +7,7 @@ from getpass import getpass
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import text
 from app.core.config import get_settings
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 
 async def main():
     settings = get_settings()
@@ -16,7 +16,7 @@ async def main():
     if not password:
         print("No password entered, aborting.")
         return
-    password_hash = get_password_hash(password)
+    password_hash = await get_password_hash_async(password)
     engine = create_async_engine(settings.DATABASE_URL)
     async with engine.begin() as conn:
         res = await conn.execute(text("SELECT id FROM users WHERE username = :username"), {"username": username})
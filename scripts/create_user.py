@@ -13,7 +13,7 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy import text
 
 from app.core.config import get_settings
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 
 
 async def main():
@@ -26,7 +26,7 @@ async def main():
         print("No password entered, aborting.")
         return
 
-    password_hash = get_password_hash(password)
+    password_hash = await get_password_hash_async(password)
 
     engine = create_async_engine(settings.DATABASE_URL)
     async with engine.begin() as conn:
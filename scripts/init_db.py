@@ -4,7 +4,7 @@ import os
 from getpass import getpass
 
 from app.core.config import get_settings
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 from app.models.users import User
 from sqlalchemy.ext.asyncio import create_async_engine
 from alembic import command
@@ -21,6 +21,7 @@ async def init_db():
     admin_username = input("Enter admin username (default: admin): ") or "admin"
     admin_email = input("Enter admin email (default: admin@example.com): ") or "admin@example.com"
     admin_password = getpass("Enter admin password (default: admin): ") or "admin"
+    admin_password_hash = await get_password_hash_async(admin_password)
 
     # Create admin user in database
     engine = create_async_engine(settings.SQLITE_URL)
@@ -40,7 +41,7 @@ async def init_db():
                 {
                     "username": admin_username,
                     "email": admin_email,
-                    "password_hash": get_password_hash(admin_password)
+                    "password_hash": admin_password_hash
                 }
             )
             print(f"\nAdmin user '{admin_username}' created successfully!")
@@ -0,0 +1,38 @@
+"""Delete expired and idle login sessions once.
+
+Run this from the project root with the venv active:
+
+    source .venv/bin/activate
+    python scripts/purge_sessions.py [--batch-size N]
+
+The running app purges on its own every SESSION_PURGE_INTERVAL_SECONDS;
+use this from cron when the background purge is disabled.
+"""
+import argparse
+import asyncio
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, dispose_engines, init_engines
+from app.core.session_purge import SessionPurger
+
+
+async def main(batch_size: int):
+    settings = get_settings()
+    purger = SessionPurger(
+        interval=0,
+        batch_size=batch_size,
+        pause=settings.SESSION_PURGE_PAUSE_SECONDS,
+    )
+    init_engines()
+    async with AsyncSessionLocal() as db:
+        deleted = await purger.purge(db)
+    await dispose_engines()
+    stats = purger.stats()
+    print(f"Deleted {deleted} stale sessions in {stats['last_batches']} batches "
+          f"({stats['last_duration_seconds']:.2f}s).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=get_settings().SESSION_PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
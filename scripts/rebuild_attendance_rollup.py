@@ -0,0 +1,31 @@
+"""Rebuild the monthly attendance rollup from the raw attendance rows.
+
+Run this from the project root with the venv active:
+
+    source .venv/bin/activate
+    python scripts/rebuild_attendance_rollup.py [--student-id ID]
+
+The rollup is normally kept up to date by the attendance endpoints; use this
+after importing attendance directly into the database or to repair drift.
+"""
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal, dispose_engines, init_engines
+from app.core.rollup import rebuild_attendance_monthly
+
+
+async def main(student_id=None):
+    init_engines()
+    async with AsyncSessionLocal() as db:
+        rows = await rebuild_attendance_monthly(db, student_id=student_id)
+        await db.commit()
+    await dispose_engines()
+    scope = f"student {student_id}" if student_id is not None else "all students"
+    print(f"Rebuilt {rows} monthly rollup rows for {scope}.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--student-id", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.student_id))
@@ -39,9 +39,18 @@ if [ ! -f "attendance.db" ]; then
     alembic upgrade head
 fi
 
+# WORKERS=N starts N uvicorn workers on the shared SQLite file; their
+# in-process caches are kept coherent through the cache_versions table
+WORKERS=${WORKERS:-1}
+WORKER_ARGS=""
+if [ "$WORKERS" -gt 1 ]; then
+    export CACHE_COHERENCE_ENABLED=true
+    WORKER_ARGS="--workers $WORKERS"
+fi
+
 # Save PID to file for later stopping
-echo -e "${GREEN}Starting server...${NC}"
-nohup uvicorn app.main:app --host 127.0.0.1 --port 8000 > server.log 2>&1 &
+echo -e "${GREEN}Starting server (${WORKERS} worker(s))...${NC}"
+nohup uvicorn app.main:app --host 127.0.0.1 --port 8000 $WORKER_ARGS > server.log 2>&1 &
 echo $! > uvicorn.pid
 
 # Wait a moment for server to start
@@ -1,8 +1,9 @@
 import asyncio
 import pytest
+from contextlib import contextmanager
 from typing import Any, AsyncGenerator, Dict
 from httpx import AsyncClient, ASGITransport
-from sqlalchemy import insert
+from sqlalchemy import event, insert
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
@@ -10,7 +11,7 @@ from sqlalchemy.pool import StaticPool
 from app.core.config import get_settings
 from app.core.database import Base
 from app.main import app
-from app.core.security import create_access_token, get_password_hash
+from app.core.security import create_access_token, get_password_hash, new_session_id, session_key
 from app.models.users import User
 
 settings = get_settings()
@@ -60,7 +61,15 @@ async def db(event_loop) -> AsyncSessionGen:
 @pytest.fixture
 async def client(db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     """Create a test client."""
-    from app.core.database import get_db
+    from app.core.attendance_index import attendance_index
+    from app.core.cache import principal_cache
+    from app.core.database import get_db, get_read_db
+    from app.core.last_seen import last_seen_buffer
+
+    # Cached principals would otherwise leak between per-test databases
+    principal_cache.clear()
+    last_seen_buffer.clear()
+    attendance_index.clear()
 
     async def override_get_db():
         try:
@@ -69,6 +78,7 @@ async def client(db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
             await db.close()
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
@@ -84,24 +94,52 @@ async def auth_headers(db: AsyncSession) -> Dict[str, str]:
         email="test@example.com",
         is_active=True
     )
-    test_user.set_password("testpass123")
+    await test_user.set_password_async("testpass123")
     db.add(test_user)
     await db.commit()
     await db.refresh(test_user)
     
     # Create access token
-    access_token = create_access_token(data={"sub": test_user.username})
+    jti = new_session_id()
+    access_token = create_access_token(data={"sub": test_user.username}, jti=jti)
     
     # Create a session record so dependency check passes
     from app.models.sessions import Session as UserSession
     session = UserSession(
         user_id=test_user.id,
         device_name="test-client",
-        session_token=access_token,
+        session_key=session_key(access_token, jti),
         ip_address="127.0.0.1",
         user_agent="test-agent"
     )
     db.add(session)
     await db.commit()
 
-    return {"Authorization": f"Bearer {access_token}"}
\ No newline at end of file
+    return {"Authorization": f"Bearer {access_token}"}
+
+@pytest.fixture
+def max_statements(db: AsyncSession):
+    """Assert that a block issues at most ``limit`` SQL statements.
+
+    Usage: ``with max_statements(1, "GET /api/v1/students/"): await client.get(...)``.
+    The yielded list holds the statements seen so far.
+    """
+    engine = db.bind.sync_engine
+
+    @contextmanager
+    def check(limit: int, label: str = "block"):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        assert len(statements) <= limit, (
+            f"{label} ran {len(statements)} SQL statements (max {limit}):\n" + "\n".join(statements)
+        )
+
+    return check
@@ -1,6 +1,7 @@
 import pytest
 from datetime import date
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import get_password_hash
@@ -82,6 +83,99 @@ async def test_student_crud(client: AsyncClient, db: AsyncSession, auth_headers:
     )
     assert response.status_code == 200
 
+@pytest.mark.asyncio
+async def test_student_csv_import(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test streamed CSV import with chunked commits and a per-row report."""
+    from app.core.config import get_settings
+
+    lines = ["Name,Age,Level,Price_Per_Class"]
+    lines += [f"Student {i},{10 + i % 5},Beginner,12.50" for i in range(25)]
+    lines += [
+        ",12,Beginner,10",          # row 27: empty name
+        "Bad Age,old,Beginner,10",  # row 28
+        "Bad Price,12,Beginner,0",  # row 29
+        "",
+        '"Comma, Name",14,,10',     # row 31: empty level
+    ]
+    csv_body = ("\r\n".join(lines) + "\r\n").encode()
+
+    settings = get_settings()
+    original = settings.STUDENT_IMPORT_BATCH_SIZE
+    settings.STUDENT_IMPORT_BATCH_SIZE = 10
+    try:
+        response = await client.post(
+            "/api/v1/students/import",
+            files={"file": ("students.csv", csv_body, "text/csv")},
+            headers=auth_headers
+        )
+    finally:
+        settings.STUDENT_IMPORT_BATCH_SIZE = original
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 25
+    assert report["failed"] == 4
+    errors = {e["row"]: e["errors"] for e in report["errors"]}
+    assert errors[27] == ["Student name must not be empty"]
+    assert errors[28] == ["age must be an integer"]
+    assert errors[29] == ["price_per_class must be positive"]
+    assert errors[31] == ["level must not be empty"]
+
+    response = await client.get("/api/v1/students/", params={"limit": 100}, headers=auth_headers)
+    students = {s["name"]: s for s in response.json()}
+    assert len(students) == 25
+    assert students["Student 3"]["age"] == 13
+    assert students["Student 3"]["price_per_class"] == "12.50"
+
+    response = await client.post(
+        "/api/v1/students/import",
+        files={"file": ("students.csv", b"name,age\nAnn,12\n", "text/csv")},
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+    assert "level" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_student_csv_import_edge_cases(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test quoted fields across read chunks and rows the API schema rejects."""
+    from app.api.v1 import students as students_api
+
+    csv_body = (
+        'name,age,level,price_per_class\n'
+        '"Ann\nMarie",10,Beginner,10\n'          # row 2: newline inside a quoted field
+        '"Line\x0bTab Sep",11,Beginner,10\n'  # row 3: not line breaks for CSV
+        'Nan Price,12,Beginner,NaN\n'             # row 4
+        'Inf Price,12,Beginner,inf\n'             # row 5
+        'Long Price,12,Beginner,12345678901\n'    # row 6: more than 10 digits
+        'Negative Age,-5,Beginner,10\n'           # row 7
+        'Bad Price,12,Beginner,abc\n'             # row 8
+        '"Last ""Row""",13,Advanced,20'           # row 9: no trailing newline
+    ).encode()
+
+    original = students_api.IMPORT_READ_SIZE
+    students_api.IMPORT_READ_SIZE = 16
+    try:
+        response = await client.post(
+            "/api/v1/students/import",
+            files={"file": ("students.csv", csv_body, "text/csv")},
+            headers=auth_headers
+        )
+    finally:
+        students_api.IMPORT_READ_SIZE = original
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 3
+    errors = {e["row"]: e["errors"] for e in report["errors"]}
+    assert sorted(errors) == [4, 5, 6, 7, 8]
+    assert all(e[0].startswith("price_per_class") for row, e in errors.items() if row != 7)
+    assert errors[7][0].startswith("age")
+    assert errors[8] == ["price_per_class must be a number"]
+
+    response = await client.get("/api/v1/students/", headers=auth_headers)
+    names = {s["name"] for s in response.json()}
+    assert names == {"Ann\nMarie", "Line\x0bTab Sep", 'Last "Row"'}
+
+
 @pytest.mark.asyncio
 async def test_attendance(client: AsyncClient, db: AsyncSession, auth_headers: dict):
     """Test attendance marking and retrieval."""
@@ -124,4 +218,776 @@ async def test_attendance(client: AsyncClient, db: AsyncSession, auth_headers: d
         headers=auth_headers
     )
     assert response.status_code == 200
-    assert len(response.json()) == 1
\ No newline at end of file
+    assert len(response.json()) == 1
+
+@pytest.mark.asyncio
+async def test_bulk_attendance(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test marking attendance for several students in one request."""
+    students = []
+    for name in ("Alice", "Bob"):
+        student = Student(name=name, level="Beginner", price_per_class=40.0)
+        student.set_age(20)
+        db.add(student)
+        students.append(student)
+    await db.commit()
+    alice, bob = students
+
+    # Pre-mark Alice so the bulk call hits the unique constraint
+    response = await client.post(
+        "/api/v1/attendance/",
+        json={"student_id": alice.id, "date": str(date.today())},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/api/v1/attendance/bulk",
+        json={"date": str(date.today()), "student_ids": [alice.id, bob.id, 9999, bob.id]},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    results = {r["student_id"]: r for r in response.json()}
+    assert len(response.json()) == 3
+    assert results[alice.id]["status"] == "duplicate"
+    assert results[bob.id]["status"] == "marked"
+    assert results[bob.id]["attendance_id"] is not None
+    assert results[9999]["status"] == "not_found"
+
+    response = await client.get(
+        "/api/v1/attendance/",
+        params={"start_date": str(date.today()), "end_date": str(date.today())},
+        headers=auth_headers
+    )
+    assert len(response.json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_principal_cache(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test that resolved principals are cached and dropped on revocation."""
+    from app.core.cache import principal_cache
+
+    response = await client.get("/api/v1/sessions/", headers=auth_headers)
+    assert response.status_code == 200
+    session_id = response.json()[0]["id"]
+
+    hits = principal_cache.stats()["hits"]
+    response = await client.get("/api/v1/students/", headers=auth_headers)
+    assert response.status_code == 200
+    assert principal_cache.stats()["hits"] == hits + 1
+
+    # Revoking the session must reject the very next request
+    response = await client.delete(f"/api/v1/sessions/{session_id}", headers=auth_headers)
+    assert response.status_code == 200
+    response = await client.get("/api/v1/students/", headers=auth_headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_last_seen_write_behind(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test that last_seen updates are buffered and flushed in one batch."""
+    from sqlalchemy import event
+    from sqlalchemy.exc import OperationalError
+    from app.core.last_seen import last_seen_buffer
+    from app.models.sessions import Session as UserSession
+
+    session = await db.scalar(select(UserSession))
+    before = session.last_seen
+
+    response = await client.get("/api/v1/students/", headers=auth_headers)
+    assert response.status_code == 200
+    assert session.id in last_seen_buffer._pending
+
+    assert await last_seen_buffer.flush(db) == 1
+    assert len(last_seen_buffer) == 0
+    after = await db.scalar(select(UserSession.last_seen).where(UserSession.id == session.id))
+    assert after.replace(tzinfo=None) >= before.replace(tzinfo=None)
+
+    # A failed flush (e.g. a locked database) rolls back but must not fail the login
+    def locked(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE sessions"):
+            raise OperationalError(statement, parameters, Exception("database is locked"))
+
+    engine = db.bind.sync_engine
+    last_seen_buffer.touch(session.id)
+    event.listen(engine, "before_cursor_execute", locked)
+    try:
+        response = await client.post(
+            "/api/v1/auth/login",
+            data={"username": "testuser", "password": "testpass123"}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", locked)
+    assert response.status_code == 200
+    assert session.id in last_seen_buffer._pending
+
+
+@pytest.mark.asyncio
+async def test_session_keys_replace_stored_tokens(client: AsyncClient, db: AsyncSession):
+    """Test that sessions are stored and found by their 16-byte key."""
+    from app.core.security import token_session_key
+    from app.models.sessions import Session as UserSession
+
+    user = User(username="keyed", email="keyed@example.com", is_active=True)
+    await user.set_password_async("secret123")
+    db.add(user)
+    await db.commit()
+
+    response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": "keyed", "password": "secret123"}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    stored = (await db.scalars(select(UserSession.session_key))).all()
+    assert stored == [token_session_key(token)]
+    assert len(stored[0]) == 16
+
+    response = await client.get("/api/v1/students/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+
+    client.cookies.set("session", token)
+    await client.post("/api/v1/auth/logout")
+    assert (await db.scalars(select(UserSession.id))).all() == []
+
+
+@pytest.mark.asyncio
+async def test_session_purge(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test batched deletion of expired and idle sessions."""
+    from datetime import datetime, timedelta
+    from app.core.config import get_settings
+    from app.core.session_purge import SessionPurger
+    from app.models.sessions import Session as UserSession
+
+    settings = get_settings()
+    now = datetime.utcnow()
+    token_lifetime = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    idle_after = timedelta(minutes=settings.SESSION_CLEANUP_MINUTES)
+    user_id = await db.scalar(select(User.id))
+    ages = {
+        "fresh": (now, now),
+        "expired": (now - token_lifetime * 2, now),
+        "idle": (now - token_lifetime / 2, now - idle_after * 2),
+        "recent": (now - token_lifetime / 2, now - timedelta(minutes=1)),
+        "old": (now - token_lifetime * 10, now - idle_after * 10),
+    }
+    for name, (created_at, last_seen) in ages.items():
+        db.add(UserSession(
+            user_id=user_id,
+            device_name=name,
+            session_key=name.encode().ljust(16, b"\0"),
+            ip_address="127.0.0.1",
+            user_agent="test-agent",
+            created_at=created_at,
+            last_seen=last_seen,
+        ))
+    await db.commit()
+
+    purger = SessionPurger(interval=0, batch_size=2, pause=0)
+    assert await purger.purge(db, now=now) == 3
+    remaining = set((await db.scalars(select(UserSession.device_name))).all())
+    assert remaining == {"test-client", "fresh", "recent"}
+    stats = purger.stats()
+    assert stats["runs"] == 1 and stats["deleted_total"] == 3
+    assert stats["last_batches"] == 3  # ids 1..6 in windows of two
+
+    # The purge must not touch live logins
+    response = await client.get("/api/v1/sessions/", headers=auth_headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_summary_report(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test the server-side aggregated summary report."""
+    from datetime import timedelta
+    from decimal import Decimal
+    from app.core.rollup import rebuild_attendance_monthly
+    from app.models.attendance import Attendance
+
+    busy = Student(name="Busy", level="Advanced", price_per_class=12.5)
+    busy.set_age(30)
+    idle = Student(name="Idle", level="Beginner", price_per_class=10)
+    idle.set_age(31)
+    db.add_all([busy, idle])
+    await db.commit()
+
+    today = date.today()
+    for offset in range(3):
+        db.add(Attendance(student_id=busy.id, date=today - timedelta(days=offset), marked_by_user_id=1))
+    # Outside the requested range
+    db.add(Attendance(student_id=busy.id, date=today - timedelta(days=40), marked_by_user_id=1))
+    # Rows added directly bypass the endpoints, so rebuild the monthly rollup
+    await rebuild_attendance_monthly(db)
+    await db.commit()
+
+    response = await client.get(
+        "/api/v1/reports/summary",
+        params={"start_date": str(today - timedelta(days=30)), "end_date": str(today)},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    report = response.json()
+    rows = {r["name"]: r for r in report["students"]}
+    assert rows["Busy"]["classes_attended"] == 3
+    assert Decimal(rows["Busy"]["total_fee"]) == Decimal("37.50")
+    assert rows["Idle"]["classes_attended"] == 0
+    assert Decimal(report["grand_total"]) == Decimal("37.50")
+
+
+@pytest.mark.asyncio
+async def test_attendance_monthly_rollup(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test that writes maintain the monthly rollup and range counts use it."""
+    from app.core.fees import fee_periods
+    from app.core.rollup import rebuild_attendance_monthly
+    from app.models.attendance import Attendance, AttendanceMonthly
+
+    student = Student(name="Rolled", level="Beginner", price_per_class=10)
+    student.set_age(20)
+    db.add(student)
+    await db.commit()
+
+    days = [date(2026, 1, 20), date(2026, 2, 3), date(2026, 2, 17), date(2026, 3, 2), date(2026, 3, 30)]
+    for day in days[:-1]:
+        response = await client.post(
+            "/api/v1/attendance/",
+            json={"student_id": student.id, "date": str(day)},
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+    response = await client.post(
+        "/api/v1/attendance/bulk",
+        json={"date": str(days[-1]), "student_ids": [student.id]},
+        headers=auth_headers
+    )
+    assert response.json()[0]["status"] == "marked"
+
+    async def rollup():
+        rows = await db.execute(
+            select(AttendanceMonthly.year_month, AttendanceMonthly.class_count)
+            .where(AttendanceMonthly.student_id == student.id)
+        )
+        return dict(rows.all())
+
+    assert await rollup() == {"2026-01": 1, "2026-02": 2, "2026-03": 2}
+
+    # Deleting the only January class removes the month entirely
+    january_id = await db.scalar(select(Attendance.id).where(Attendance.date == days[0]))
+    response = await client.delete(f"/api/v1/attendance/{january_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert await rollup() == {"2026-02": 2, "2026-03": 2}
+
+    # Whole February from the rollup plus the partial March edge from raw rows
+    async def classes(start, end):
+        return [period.classes for period in (await fee_periods(db, start, end))[student.id]]
+
+    assert await classes(date(2026, 1, 15), date(2026, 3, 15)) == [3]
+    assert await classes(date(2026, 2, 10), date(2026, 2, 20)) == [1]
+
+    maintained = await rollup()
+    await rebuild_attendance_monthly(db)
+    await db.commit()
+    assert await rollup() == maintained
+
+    response = await client.delete(f"/api/v1/students/{student.id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert await rollup() == {}
+
+
+@pytest.mark.asyncio
+async def test_attendance_bitmap_index(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test the in-memory attendance index stays in step with writes."""
+    from datetime import timedelta
+    from app.core.attendance_index import attendance_index
+    from app.models.attendance import Attendance
+
+    students = []
+    for name in ("Ivy", "Jon"):
+        student = Student(name=name, level="Beginner", price_per_class=10)
+        student.set_age(21)
+        students.append(student)
+    db.add_all(students)
+    await db.commit()
+    ivy, jon = students
+    today = date.today()
+    db.add(Attendance(student_id=ivy.id, date=today - timedelta(days=600), marked_by_user_id=1))
+    await db.commit()
+
+    await attendance_index.load(db)
+    assert attendance_index.contains(ivy.id, today - timedelta(days=600))
+
+    response = await client.post(
+        "/api/v1/attendance/bulk",
+        json={"date": str(today), "student_ids": [ivy.id, jon.id]},
+        headers=auth_headers
+    )
+    assert [r["status"] for r in response.json()] == ["marked", "marked"]
+    response = await client.post(
+        "/api/v1/attendance/",
+        json={"student_id": ivy.id, "date": str(today)},
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    response = await client.get("/api/v1/attendance/present", params={"date": str(today)}, headers=auth_headers)
+    assert response.json() == sorted([ivy.id, jon.id])
+    assert attendance_index.count(ivy.id, today - timedelta(days=700), today) == 2
+    assert attendance_index.count(ivy.id, today - timedelta(days=599), today) == 1
+
+    jon_row = await db.scalar(select(Attendance.id).where(Attendance.student_id == jon.id))
+    await client.delete(f"/api/v1/attendance/{jon_row}", headers=auth_headers)
+    assert attendance_index.present_on(today) == [ivy.id]
+
+    stats = (await client.get("/api/v1/attendance/index", headers=auth_headers)).json()
+    assert stats["loaded"] and stats["students"] == 1 and stats["days_marked"] == 2
+    assert stats["bitmap_bytes"] > 0
+
+    response = await client.post("/api/v1/attendance/index/verify", headers=auth_headers)
+    assert response.json()["consistent"]
+
+    # A row written behind the index's back is reported and repaired
+    db.add(Attendance(student_id=jon.id, date=today - timedelta(days=1), marked_by_user_id=1))
+    await db.commit()
+    report = (await client.post(
+        "/api/v1/attendance/index/verify", params={"repair": True}, headers=auth_headers
+    )).json()
+    assert report["missing_count"] == 1
+    assert report["missing"] == [{"student_id": jon.id, "date": str(today - timedelta(days=1))}]
+    assert attendance_index.contains(jon.id, today - timedelta(days=1))
+
+
+@pytest.mark.asyncio
+async def test_price_history_fees(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test that price changes only affect classes from their effective date on."""
+    from decimal import Decimal
+
+    response = await client.post(
+        "/api/v1/students/",
+        json={"name": "Priced", "age": 12, "level": "Beginner", "price_per_class": "10.00"},
+        headers=auth_headers
+    )
+    student_id = response.json()["id"]
+    days = [date(2024, 1, 20), date(2024, 2, 3), date(2024, 2, 17), date(2024, 3, 2), date(2024, 3, 30)]
+    response = await client.post(
+        "/api/v1/attendance/",
+        json={"student_id": student_id, "date": str(days[0])},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    for day in days[1:]:
+        response = await client.post(
+            "/api/v1/attendance/bulk",
+            json={"date": str(day), "student_ids": [student_id]},
+            headers=auth_headers
+        )
+        assert response.json()[0]["status"] == "marked"
+
+    # Backdated change, then a change from today through the usual update
+    response = await client.post(
+        f"/api/v1/students/{student_id}/prices",
+        json={"effective_from": "2024-02-10", "price": "12.50"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    response = await client.put(
+        f"/api/v1/students/{student_id}", json={"price_per_class": "15.00"}, headers=auth_headers
+    )
+    assert response.json()["price_per_class"] == "15.00"
+    response = await client.post(
+        f"/api/v1/students/{student_id}/prices",
+        json={"effective_from": "2999-01-01", "price": "20.00"},
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    response = await client.get(f"/api/v1/students/{student_id}/prices", headers=auth_headers)
+    assert [(p["effective_from"], p["price"]) for p in response.json()] == [
+        ("0001-01-01", "10.00"), ("2024-02-10", "12.50"), (str(date.today()), "15.00")
+    ]
+
+    response = await client.get(
+        "/api/v1/reports/fees",
+        params={"start_date": "2024-01-01", "end_date": "2024-03-31", "student_id": student_id},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    fees = response.json()["students"][0]
+    assert [
+        (p["start_date"], p["end_date"], Decimal(p["price_per_class"]), p["classes_attended"])
+        for p in fees["periods"]
+    ] == [
+        ("2024-01-01", "2024-02-09", Decimal("10.00"), 2),
+        ("2024-02-10", "2024-03-31", Decimal("12.50"), 3),
+    ]
+    assert Decimal(fees["total_fee"]) == Decimal("57.50")
+
+    response = await client.get(
+        "/api/v1/reports/summary",
+        params={"start_date": "2024-02-15", "end_date": "2024-03-15"},
+        headers=auth_headers
+    )
+    row = response.json()["students"][0]
+    assert row["classes_attended"] == 2
+    assert Decimal(row["total_fee"]) == Decimal("25.00")
+    assert Decimal(row["price_per_class"]) == Decimal("15.00")
+
+    response = await client.delete(f"/api/v1/students/{student_id}", headers=auth_headers)
+    assert response.status_code == 200
+    response = await client.get(f"/api/v1/students/{student_id}/prices", headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_individual_reports_zip(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test the streamed ZIP of per-student PDF reports."""
+    import io
+    import zipfile
+    from app.models.attendance import Attendance
+
+    students = []
+    for name in ("Ann", "Ben"):
+        student = Student(name=name, level="Beginner", price_per_class=20)
+        student.set_age(18)
+        students.append(student)
+    db.add_all(students)
+    await db.commit()
+    db.add(Attendance(student_id=students[0].id, date=date.today(), marked_by_user_id=1))
+    await db.commit()
+
+    response = await client.post(
+        "/api/v1/reports/individual.zip",
+        json={
+            "student_ids": [s.id for s in students],
+            "start_date": str(date.today()),
+            "end_date": str(date.today())
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    names = archive.namelist()
+    assert len(names) == 2
+    assert all(archive.read(n).startswith(b"%PDF-") for n in names)
+
+
+@pytest.mark.asyncio
+async def test_attendance_keyset_pagination(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test cursor pagination over (date DESC, id DESC)."""
+    from datetime import timedelta
+    from app.models.attendance import Attendance
+
+    student = Student(name="Paged", level="Beginner", price_per_class=10)
+    student.set_age(22)
+    db.add(student)
+    await db.commit()
+    for offset in range(5):
+        db.add(Attendance(student_id=student.id, date=date.today() - timedelta(days=offset), marked_by_user_id=1))
+    await db.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/v1/attendance/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen.extend(r["date"] for r in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 5
+
+    response = await client.get("/api/v1/attendance/", params={"cursor": "garbage"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_attendance_export(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test streaming CSV and NDJSON export."""
+    import json
+    from datetime import timedelta
+    from app.models.attendance import Attendance
+
+    student = Student(name="Exported", level="Beginner", price_per_class=10)
+    student.set_age(22)
+    db.add(student)
+    await db.commit()
+    for offset in range(3):
+        db.add(Attendance(student_id=student.id, date=date.today() - timedelta(days=offset), marked_by_user_id=1))
+    await db.commit()
+
+    response = await client.get("/api/v1/attendance/export", params={"format": "csv"}, headers=auth_headers)
+    assert response.status_code == 200
+    lines = response.text.strip().splitlines()
+    assert lines[0] == "id,student_id,date,marked_by_user_id,created_at"
+    assert len(lines) == 4
+
+    response = await client.get(
+        "/api/v1/attendance/export",
+        params={"format": "ndjson", "start_date": str(date.today())},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == [{
+        "id": rows[0]["id"],
+        "student_id": student.id,
+        "date": str(date.today()),
+        "marked_by_user_id": 1,
+        "created_at": rows[0]["created_at"],
+    }]
+
+    response = await client.get("/api/v1/attendance/export", params={"format": "xml"}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_roster_etag_and_compression(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test conditional GETs on the roster and compression of large bodies."""
+    for i in range(40):
+        student = Student(name=f"Student {i:02d}", level="Beginner", price_per_class=15)
+        student.set_age(20)
+        db.add(student)
+    await db.commit()
+
+    response = await client.get("/api/v1/students/", headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "content-encoding" not in response.headers
+
+    # Unchanged roster -> 304 without a body
+    response = await client.get("/api/v1/students/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # Large JSON bodies are compressed and the ETag is tagged per encoding
+    response = await client.get("/api/v1/students/", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 40
+    assert response.headers["etag"] == etag[:-1] + '-gzip"'
+    response = await client.get("/api/v1/students/", headers={**auth_headers, "Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()) == 40
+    response = await client.get(
+        "/api/v1/students/",
+        headers={**auth_headers, "If-None-Match": response.headers["etag"]}
+    )
+    assert response.status_code == 304
+
+    # Any roster write invalidates the ETag
+    response = await client.put(
+        f"/api/v1/students/{student.id}", json={"level": "Advanced"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    response = await client.get("/api/v1/students/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_fast_list_responses_match_schema(
+    client: AsyncClient, db: AsyncSession, auth_headers: dict, monkeypatch
+):
+    """Test that the fast list path returns exactly what the Pydantic path does."""
+    from app.core.config import get_settings
+    from app.models.attendance import Attendance
+
+    for i in range(3):
+        student = Student(name=f"Fast {i}", level="Beginner", price_per_class="12.50")
+        student.set_age(20 + i)
+        db.add(student)
+    await db.commit()
+    db.add(Attendance(student_id=student.id, date=date.today(), marked_by_user_id=1))
+    await db.commit()
+
+    settings = get_settings()
+    responses = {}
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "FAST_LIST_RESPONSES", fast)
+        students = await client.get("/api/v1/students/", headers=auth_headers)
+        attendance = await client.get("/api/v1/attendance/", headers=auth_headers)
+        assert students.status_code == attendance.status_code == 200
+        responses[fast] = (students.json(), attendance.json())
+    assert responses[True] == responses[False]
+
+
+@pytest.mark.asyncio
+async def test_pages_render_without_queries(client: AsyncClient, auth_headers: dict, max_statements):
+    """Test that anonymous and cached page renders issue no SQL."""
+    from app.pages import precompile_templates
+
+    precompile_templates()
+    with max_statements(0, "anonymous GET /students"):
+        response = await client.get("/students")
+    assert response.status_code == 200
+    assert "Login" in response.text
+
+    await client.get("/api/v1/students/", headers=auth_headers)  # warms the principal cache
+    with max_statements(0, "cached GET /students"):
+        response = await client.get("/students", headers=auth_headers)
+    assert response.status_code == 200
+    assert "Logout" in response.text
+
+
+@pytest.mark.asyncio
+async def test_fingerprinted_static_assets(client: AsyncClient):
+    """Test hashed asset URLs, immutable caching and precompressed variants."""
+    import re
+
+    response = await client.get("/auth/login")
+    match = re.search(r'href="(/static/css/styles\.[0-9a-f]{12}\.css)"', response.text)
+    assert match
+    url = match.group(1)
+    original = (await client.get("/static/css/styles.css")).content
+
+    response = await client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == original  # httpx decodes transparently
+
+    response = await client.get(url, headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.content == original
+
+    response = await client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == original
+
+    response = await client.get(url, headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test per-route latency, SQL and commit metrics in Prometheus format."""
+    from httpx import ASGITransport
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from app.core.metrics import instrument_engine, metrics
+    from app.main import app
+
+    instrument_engine(db.bind)
+    metrics.reset()
+
+    response = await client.post(
+        "/api/v1/students/",
+        json={"name": "Metric", "age": 9, "level": "Beginner", "price_per_class": "10.00"},
+        headers=auth_headers
+    )
+    student_id = response.json()["id"]
+    await client.get(f"/api/v1/students/{student_id}", headers=auth_headers)
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+
+    route = 'method="GET",route="/api/v1/students/{student_id}"'
+    assert f'http_requests_total{{{route},status="200"}} 1' in body
+    assert f'http_request_duration_seconds_count{{{route}}} 1' in body
+    assert f'http_request_duration_seconds_bucket{{{route},le="+Inf"}} 1' in body
+    assert 'http_request_db_commits_total{method="POST",route="/api/v1/students/"} 1' in body
+    assert "http_requests_in_flight 1" in body  # the scrape itself
+
+    prefix = f"http_request_db_statements_sum{{{route}}} "
+    statements = [float(line[len(prefix):]) for line in body.splitlines() if line.startswith(prefix)]
+    assert statements and statements[0] >= 1
+    assert "db_statements_total" in body and "principal_cache_hits" in body
+
+    # A failing statement leaves no start time behind on the pooled connection
+    with pytest.raises(OperationalError):
+        await db.execute(text("SELECT * FROM no_such_table"))
+    assert "query_start" not in (await db.connection()).info
+    await db.rollback()
+
+    # Only METRICS_ALLOWED_IPS may scrape; the test client is 127.0.0.1
+    transport = ASGITransport(app=app, client=("203.0.113.7", 40000))
+    async with AsyncClient(transport=transport, base_url="http://test") as remote:
+        response = await remote.get("/metrics")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_statement_budgets(client: AsyncClient, db: AsyncSession, auth_headers: dict, max_statements):
+    """Test the SQL statement budget of the hot endpoints."""
+    student = Student(name="Budget", level="Beginner", price_per_class=10)
+    student.set_age(10)
+    db.add(student)
+    await db.commit()
+
+    # Cold principal: user and session lookups, then the list itself
+    with max_statements(3, "first authenticated request"):
+        await client.get("/api/v1/students/", headers=auth_headers)
+    with max_statements(1, "GET /api/v1/students/"):
+        await client.get("/api/v1/students/", headers=auth_headers)
+    with max_statements(1, "GET /api/v1/students/{id}"):
+        await client.get(f"/api/v1/students/{student.id}", headers=auth_headers)
+    with max_statements(4, "POST /api/v1/attendance/"):
+        response = await client.post(
+            "/api/v1/attendance/",
+            json={"student_id": student.id, "date": str(date.today())},
+            headers=auth_headers
+        )
+    assert response.status_code == 200
+    with max_statements(1, "GET /api/v1/attendance/"):
+        await client.get("/api/v1/attendance/", headers=auth_headers)
+    with max_statements(3, "GET /api/v1/reports/summary"):
+        await client.get(
+            "/api/v1/reports/summary",
+            params={"start_date": str(date.today()), "end_date": str(date.today())},
+            headers=auth_headers
+        )
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log(client: AsyncClient, db: AsyncSession, auth_headers: dict):
+    """Test slow-query capture with query plans and the N+1 detector."""
+    from httpx import ASGITransport
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from app.core import query_log as query_log_module
+    from app.core.query_log import QueryLog, QueryLogMiddleware, install_query_log
+    from app.main import app
+
+    log = QueryLog(threshold_ms=0, n_plus_one_threshold=3)
+    install_query_log(db.bind, log)
+
+    await db.execute(text("SELECT id FROM attendance WHERE marked_by_user_id = :user_id"), {"user_id": 1})
+    entry = log.slow_queries[-1]
+    assert entry.route == "<no request>"
+    assert entry.parameters == "(int)"
+    assert entry.full_scans and "attendance" in entry.full_scans[0]
+
+    log.clear()
+    transport = ASGITransport(app=QueryLogMiddleware(app, query_log=log))
+    async with AsyncClient(transport=transport, base_url="http://test") as traced:
+        response = await traced.get(
+            "/api/v1/attendance/", params={"student_id": 1}, headers=auth_headers
+        )
+    assert response.status_code == 200
+    routes = {q.route for q in log.slow_queries}
+    assert "GET /api/v1/attendance/" in routes
+    # The student filter is served by uix_student_date, not a table scan
+    listing = [q for q in log.slow_queries if q.statement.startswith("SELECT attendance")][-1]
+    assert listing.plan and not listing.full_scans
+
+    request = query_log_module._RequestQueries(scope={"method": "GET", "path": "/loop"})
+    token = query_log_module._current_request.set(request)
+    try:
+        for user_id in range(4):
+            await db.execute(text("SELECT id FROM users WHERE id = :id"), {"id": user_id})
+    finally:
+        query_log_module._current_request.reset(token)
+    log.finish_request(request)
+    assert log.n_plus_one[-1] == {
+        "route": "GET /loop", "statement": "SELECT id FROM users WHERE id = ?", "count": 4
+    }
+
+    # A failing statement leaves no start time behind on the pooled connection
+    with pytest.raises(OperationalError):
+        await db.execute(text("SELECT * FROM no_such_table"))
+    assert "query_log_start" not in (await db.connection()).info
+    await db.rollback()
@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.database import create_engine_from_settings
+from app.core.config import get_settings
+
+settings = get_settings()
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_applied(tmp_path):
+    # Test that every pooled connection gets the configured SQLite profile
+    engine = create_engine_from_settings(f"sqlite+aiosqlite:///{tmp_path / 'pragmas.db'}")
+    try:
+        async with engine.connect() as conn:
+            async def pragma(name):
+                return (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+
+            assert (await pragma("journal_mode")).upper() == settings.SQLITE_JOURNAL_MODE.upper()
+            assert await pragma("synchronous") == 1  # NORMAL
+            assert await pragma("busy_timeout") == settings.SQLITE_BUSY_TIMEOUT_MS
+            assert await pragma("cache_size") == settings.SQLITE_CACHE_SIZE
+            assert await pragma("temp_store") == 2  # MEMORY
+            assert await pragma("foreign_keys") == int(settings.SQLITE_FOREIGN_KEYS)
+            assert await pragma("query_only") == 0
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_read_only_engine(tmp_path):
+    # Test that the read engine refuses writes
+    engine = create_engine_from_settings(
+        f"sqlite+aiosqlite:///{tmp_path / 'readonly.db'}", read_only=True
+    )
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 1
+            with pytest.raises(Exception):
+                await conn.execute(text("CREATE TABLE t (id INTEGER)"))
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_cache_coherence_across_workers(tmp_path):
+    # Test that a write committed by one worker invalidates another worker's caches
+    from datetime import date
+
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.core.attendance_index import attendance_index
+    from app.core.cache import Principal, principal_cache, roster_version
+    from app.core.coherence import ATTENDANCE, ROSTER, SESSIONS, CacheCoherence, cache_coherence
+    from app.core.database import Base
+    from app.main import app  # noqa: F401 - building the app subscribes the cache handlers
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'shared.db'}"
+    engine = create_engine_from_settings(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    other_worker = CacheCoherence()
+    try:
+        assert cache_coherence.open(url) and other_worker.open(url)
+        roster_version.sync(cache_coherence.version(ROSTER))
+        principal_cache.set("token", Principal(user=None, session_id=1))
+        attendance_index.add(1, date(2024, 1, 1))
+        attendance_index.loaded = True
+
+        # Nothing committed yet: the check is a single pragma
+        cache_coherence.check()
+        assert cache_coherence.refreshes == 0
+
+        # Own commits are acknowledged and leave the other caches alone
+        async with sessions() as db:
+            await cache_coherence.commit(db, ROSTER, SESSIONS, ATTENDANCE)
+        cache_coherence.check()
+        assert roster_version.value == 1
+        assert principal_cache.get("token") is not None
+        assert attendance_index.loaded
+        assert cache_coherence.remote_changes == 0
+
+        # Another worker's commits reach every cache on the next check
+        async with sessions() as db:
+            await other_worker.commit(db, ROSTER)
+            await other_worker.commit(db, SESSIONS, ATTENDANCE)
+        cache_coherence.check()
+        assert roster_version.value == 2
+        assert roster_version.etag("list") != '"{}.1.list"'.format(roster_version.epoch)
+        assert principal_cache.get("token") is None
+        assert not attendance_index.loaded
+        assert cache_coherence.remote_changes == 3
+
+        # In shared mode the counter only follows the database
+        assert roster_version.bump() == 2
+    finally:
+        await attendance_index.stop()
+        attendance_index.clear()
+        principal_cache.clear()
+        roster_version.shared = False
+        cache_coherence.close()
+        other_worker.close()
+        await engine.dispose()
@@ -2,7 +2,7 @@ import pytest
 from datetime import datetime
 from unittest.mock import patch
 
-from app.core.security import encrypt_age, decrypt_age, get_password_hash, verify_password
+from app.core.security import encrypt_age, decrypt_age, decrypt_ages, get_password_hash, verify_password
 from app.models.users import User
 from app.models.students import Student
 from app.core.config import Settings
@@ -26,6 +26,39 @@ def test_age_encryption():
     assert test_age == decrypted
     assert decrypt_age(encrypt_age(30)) == 30
 
+def test_batch_age_decryption():
+    # Test batched decryption, including the threaded path and the memo cache
+    from app.core.config import get_settings
+    from app.core.security import age_cache
+
+    ages = list(range(get_settings().AGE_DECRYPT_CHUNK_SIZE * 2 + 5))
+    encrypted = [encrypt_age(a) for a in ages]
+    age_cache.clear()
+
+    assert decrypt_ages(encrypted) == ages
+    hits = age_cache.hits
+    assert decrypt_ages(encrypted[:10]) == ages[:10]
+    assert age_cache.hits == hits + 10
+    assert decrypt_ages([]) == []
+
+def test_session_keys():
+    # Test compact session keys from the jti claim, with the legacy hash fallback
+    import jwt
+    from app.core.config import get_settings
+    from app.core.security import create_access_token, new_session_id, session_key, token_session_key
+
+    jti = new_session_id()
+    token = create_access_token(data={"sub": "someone"}, jti=jti)
+    assert jwt.decode(token, get_settings().SECRET_KEY, algorithms=["HS256"])["jti"] == jti
+    key = session_key(token, jti)
+    assert len(key) == 16
+    assert token_session_key(token) == key
+
+    legacy = create_access_token(data={"sub": "someone"})
+    assert token_session_key(legacy) == session_key(legacy) != key
+    assert len(session_key(legacy)) == 16
+    assert token_session_key("not-a-token") is None
+
 def test_student_age_encryption():
     # Test student model age encryption
     student = Student(
@@ -41,9 +74,14 @@ def test_student_age_encryption():
     assert student.get_age() == test_age
     
     # Test different age
+    old_ciphertext = student.age_ciphertext
     student.set_age(30)
     assert student.get_age() == 30
 
+    # set_age drops the memoized value of the replaced ciphertext
+    from app.core.security import age_cache
+    assert age_cache.get(old_ciphertext) is None
+
 @pytest.mark.asyncio
 async def test_user_password():
     # Test User model password methods
@@ -54,7 +92,7 @@ async def test_user_password():
     )
     
     password = "securepass123"
-    user.set_password(password)
+    await user.set_password_async(password)
     
     assert user.password_hash is not None
     assert verify_password(password, user.password_hash)
@@ -84,4 +122,27 @@ def test_student_validation():
     )
     assert student.name == "Test Student"
     assert student.level == "Beginner"
-    assert student.price_per_class == 50.0
\ No newline at end of file
+    assert student.price_per_class == 50.0
+
+@pytest.mark.asyncio
+async def test_password_hasher_admission_control():
+    # Test bcrypt offloading and rejection once the queue is full
+    import asyncio
+    import threading
+    from app.core.security import PasswordHasher, PasswordHasherBusy, verify_password_async
+
+    hashed = get_password_hash("secret")
+    assert await verify_password_async("secret", hashed)
+    assert not await verify_password_async("wrong", hashed)
+
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+    running = [asyncio.ensure_future(hasher.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert hasher.in_flight == 2
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.run(release.wait)
+    release.set()
+    await asyncio.gather(*running)
+    assert hasher.in_flight == 0
+    hasher.shutdown()
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Imported by create_app()/the lifespan, never by ``import app.main``
+DEFERRED_MODULES = (
+    "sqlalchemy", "jinja2", "cryptography", "bcrypt", "jwt", "jose",
+    "app.api", "app.pages", "app.core.database", "app.core.security",
+)
+# What app.main may add on top of FastAPI itself, in milliseconds
+APP_MAIN_IMPORT_BUDGET_MS = 50
+
+
+def run_python(code: str, cwd: Path, importtime: bool = False) -> subprocess.CompletedProcess:
+    """Run ``code`` in a fresh interpreter with no .env and no settings in the environment."""
+    env = {
+        key: value for key, value in os.environ.items()
+        if key not in ("TESTING", "SECRET_KEY", "AGE_ENCRYPTION_KEY", "DATABASE_URL")
+    }
+    env["PYTHONPATH"] = str(ROOT)
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=cwd, env=env, capture_output=True, text=True
+    )
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """Module name -> (self, cumulative) microseconds from ``-X importtime`` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def test_import_app_main_budget(tmp_path):
+    # Test that importing app.main needs no .env and stays within its budget
+    result = run_python("import app.main", cwd=tmp_path, importtime=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    times = parse_importtime(result.stderr)
+    eager = sorted(
+        name for name in times
+        if any(name == module or name.startswith(module + ".") for module in DEFERRED_MODULES)
+    )
+    assert not eager, f"imported by app.main: {eager}"
+
+    app_ms = (times["app.main"][1] - times.get("fastapi", (0, 0))[1]) / 1000
+    assert app_ms < APP_MAIN_IMPORT_BUDGET_MS, f"app.main import took {app_ms:.1f}ms beyond FastAPI"
+
+
+def test_create_app_reports_missing_settings(tmp_path):
+    # Test that configuration errors surface when the app is built, not on import
+    result = run_python("import app.main\nprint('imported')\napp.main.create_app()", cwd=tmp_path)
+    assert result.stdout.strip() == "imported"
+    assert result.returncode != 0
+    assert "SECRET_KEY" in result.stderr
+
+
+def test_import_modules_without_settings(tmp_path):
+    # Test that no module reads settings at import time; they are read when used
+    modules = (
+        "app.core.database", "app.core.security", "app.pages",
+        "app.api.v1.attendance", "app.api.v1.auth", "app.api.v1.reports",
+        "app.api.v1.sessions", "app.api.v1.students",
+    )
+    result = run_python("\n".join(f"import {module}" for module in modules), cwd=tmp_path)
+    assert result.returncode == 0, result.stderr[-2000:]